@@ -1,22 +1,29 @@
 import pandas as pd
-import matplotlib as plt
-import seaborn as sns
-import os
-import matplotlib.pyplot as plt
+import numpy as np
+import argparse
+import contextlib
+import io
 
 from datetime import datetime, timedelta
 
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import time
 
 import warnings
 
+from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
+from worklist_sheets import HeaderResolver, fit_column_widths, format_date_cells, project_sheet_rows
 
 warnings.simplefilter(action='ignore', category=UserWarning)
 
 
 class WorklistAnalyzer:
 
+    EXCEL_DATE_FORMAT = 'mm/dd/yyyy'  # Cell number format for date columns when date_mode is 'excel'
+
     def __init__(self):
         """
         Initialize the WorklistAnalyzer
@@ -24,6 +31,14 @@ class WorklistAnalyzer:
         self.base_path = None
         self.output_folder = None
         self.current_date = None
+        self.file_parse_times = {}
+        self.reader_mode = 'streaming'  # 'streaming' (read-only, projected columns) or 'pandas'
+        self.date_mode = 'text'  # Date columns: 'text' (mm/dd/yyyy strings) or 'excel' (datetime64 written as real dates)
+        self.header_resolver = HeaderResolver()  # Memoized header -> column resolutions of this run
+        self.width_sample_rows = 100000  # Longer sheets are auto-fitted from an evenly spaced sample (None = every row)
+        self.markets = None  # Market codes to create files for (None = every market found)
+        self.max_workers = 1  # >1 reads the worklist files in a process pool
+        self._week_cache = {}  # Week date -> (source signature, market frames), reused by later run_week calls
 
     def set_date(self, date_str):
         """
@@ -150,8 +165,97 @@ class WorklistAnalyzer:
                     print(f"Error 2: {str(e2)}")
                     print(f"Error 3: {str(e3)}")
                     return None
-   
-       
+
+    def iter_workbook_sheets(self, file_path, desired_columns=None, required_columns=()):
+        """
+        Open a workbook once and yield each valid sheet as a DataFrame
+
+        Sheets named "Validation_Lists" are skipped. In 'streaming' reader mode
+        (and when desired_columns is given) sheets are read with openpyxl's
+        read-only row iterator and only the desired columns are materialized.
+        The time spent opening and parsing the workbook is accumulated in
+        self.file_parse_times.
+
+        Args:
+            file_path (Path): Path to the Excel file
+            desired_columns (list): Optional column names to project each sheet to
+            required_columns (list): Columns a projected sheet must have
+
+        Yields:
+            tuple: (sheet_name, DataFrame) for every valid sheet
+        """
+        streaming = (self.reader_mode == 'streaming' and desired_columns is not None
+                     and file_path.suffix.lower() == '.xlsx')
+
+        self.file_parse_times[file_path.name] = 0.0
+        start = time.perf_counter()
+        if streaming:
+            excel = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+            sheet_names = excel.sheetnames
+        else:
+            excel = pd.ExcelFile(file_path)
+            sheet_names = excel.sheet_names
+        self.file_parse_times[file_path.name] += time.perf_counter() - start
+
+        try:
+            # Skip sheet named "Validation_Lists"
+            valid_sheets = [sheet for sheet in sheet_names if sheet != "Validation_Lists"]
+            if valid_sheets:
+                print(f"Processing {len(valid_sheets)} sheets from: {file_path.name}")
+
+            for sheet_name in valid_sheets:
+                start = time.perf_counter()
+                try:
+                    if streaming:
+                        worksheet = excel[sheet_name]
+                        worksheet.reset_dimensions()
+                        df = project_sheet_rows(worksheet.iter_rows(values_only=True), self.header_resolver,
+                                                desired_columns, required_columns)
+                    else:
+                        df = excel.parse(sheet_name)
+                except Exception as e:
+                    print(f"  Error reading sheet '{sheet_name}': {str(e)}")
+                    continue
+                finally:
+                    self.file_parse_times[file_path.name] += time.perf_counter() - start
+                yield sheet_name, df
+        finally:
+            excel.close()
+
+    def partition_by_market(self, frames):
+        """
+        Split the collected sheet frames into one DataFrame per MarketCode
+
+        The frames are concatenated once and partitioned with a single groupby
+        instead of growing every market's frame sheet by sheet. Markets keep
+        their first-appearance order and each market only gets the columns
+        present in the sheets it came from.
+
+        Args:
+            frames (list): Filtered DataFrames, one per processed sheet
+
+        Returns:
+            dict: MarketCode -> DataFrame
+        """
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return {}
+
+        combined = pd.concat(frames)
+        frame_ids = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+
+        market_dfs = {}
+        groups = combined.groupby('MarketCode', sort=False).indices
+        for market_code, positions in sorted(groups.items(), key=lambda item: item[1][0]):
+            market_df = combined.take(positions)
+            market_columns = []
+            for frame_id in np.unique(frame_ids[positions]):
+                market_columns.extend(col for col in frames[frame_id].columns if col not in market_columns)
+            if len(market_columns) != len(combined.columns):
+                market_df = market_df[market_columns]
+            market_dfs[market_code] = market_df
+        return market_dfs
+
     def create_pivot_tables(self, df):
         """Create various pivot tables for analysis"""
         pivots = {}
@@ -207,6 +311,8 @@ class WorklistAnalyzer:
   
     def create_practice_visualization(self, pivot_df, market_code, output_folder):
         try:
+            plt = _get_pyplot()
+
             # Remove the 'Total' row and column for visualization
             viz_df = pivot_df.drop('Total', axis=0).drop('Total', axis=1)
 
@@ -244,7 +350,7 @@ class WorklistAnalyzer:
             plt.tight_layout()
 
             # Save the plot
-            plot_filename = f"4.28.25 {market_code}_Practice_Escalations.png"
+            plot_filename = f"{self.current_date} {market_code}_Practice_Escalations.png"
             plt.savefig(output_folder / plot_filename, dpi=300, bbox_inches='tight')
             plt.close()
 
@@ -254,8 +360,7 @@ class WorklistAnalyzer:
             print(f"Error creating visualization for {market_code}: {str(e)}") 
   
             try:
-                today = datetime.now().strftime('%m.%d')
-       
+
                 viz_df = pivot_df.drop('Total', axis=0).drop('Total', axis=1)
        
                 num_practices = len(viz_df)
@@ -278,7 +383,7 @@ class WorklistAnalyzer:
                 plt.tight_layout()
                 
         
-                plot_filename = f"{today}_{market_code}_Practice_Escalations.png"
+                plot_filename = f"{self.current_date}_{market_code}_Practice_Escalations.png"
                 plt.savefig(output_folder / plot_filename, dpi=300, bbox_inches='tight')
                 plt.close()
                 print(f"Created visualization: {plot_filename}") 
@@ -294,6 +399,14 @@ class WorklistAnalyzer:
         
         # Find all Excel files in the folder
         excel_files = self.find_excel_files_in_folder(folder_path)
+
+        # A week already read by this analyzer is reused while its files and read settings are unchanged
+        signature = (tuple((file.name, file.stat().st_size, file.stat().st_mtime_ns) for file in excel_files),
+                     self.reader_mode, self.date_mode)
+        cached = self._week_cache.get(self.current_date)
+        if cached is not None and cached[0] == signature:
+            print(f"Using week {self.current_date} read earlier in this process; worklists not re-read.")
+            return {market_code: df.copy() for market_code, df in cached[1].items()}
         
         # Define the columns to keep in the desired order
         desired_columns = [
@@ -355,114 +468,16 @@ class WorklistAnalyzer:
             'Escalation Deadline'
         ]
 
-        market_dfs = {}
+        filtered_frames = []
+        self.file_parse_times = {}
 
-        for file_path in excel_files:
-            try:
-                print(f"\nProcessing file: {file_path.name}")
-                
-                # Get all sheet names in the Excel file
-                excel = pd.ExcelFile(file_path)
-                sheet_names = excel.sheet_names
-                
-                # Skip sheet named "Validation_Lists"
-                valid_sheets = [sheet for sheet in sheet_names if sheet != "Validation_Lists"]
-                
-                if not valid_sheets:
-                    print(f"No valid sheets found in: {file_path.name}")
-                    continue
-                    
-                print(f"Processing {len(valid_sheets)} sheets from: {file_path.name}")
-                
-                # Process each sheet
-                for sheet_name in valid_sheets:
-                    try:
-                        print(f"  Reading sheet: {sheet_name}")
-                        
-                        # Read the sheet
-                        df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl')
-                        
-                        # If sheet is empty, skip it
-                        if df.empty:
-                            print(f"  Sheet '{sheet_name}' is empty, skipping.")
-                            continue
-                            
-                        # Clean up column names
-                        df.columns = [col.strip() if isinstance(col, str) else col for col in df.columns]
-                        
-                        # Find the correct column names (case-insensitive)
-                        column_mapping = {}
-                        for desired_col in desired_columns:
-                            matches = [col for col in df.columns 
-                                      if isinstance(col, str) and col.lower() == desired_col.lower()]
-                            if matches:
-                                column_mapping[desired_col] = matches[0]
-                        
-                        # If essential columns are missing, skip this sheet
-                        required_columns = ['Escalation Path', 'MarketCode']
-                        missing_required = [col for col in required_columns if col not in column_mapping]
-                        
-                        if missing_required:
-                            print(f"  Sheet '{sheet_name}' is missing required columns: {missing_required}, skipping.")
-                            continue
-                        
-                        # Select and reorder columns that exist in the file
-                        available_columns = [col for col in desired_columns if col in column_mapping.keys()]
-                        
-                        # If no available columns match, skip this sheet
-                        if not available_columns:
-                            print(f"  Sheet '{sheet_name}' has no matching columns, skipping.")
-                            continue
-                            
-                        # Select only columns that exist in the file
-                        df_selected = df[[column_mapping[col] for col in available_columns]]
-                        
-                        # Rename columns to desired names
-                        df_selected.columns = available_columns
-                        
-                        # Format date columns
-                        for col in date_columns:
-                            if col in df_selected.columns:
-                                try:
-                                    df_selected[col] = pd.to_datetime(df_selected[col], errors='coerce').dt.strftime('%m/%d/%Y')
-                                except Exception as e:
-                                    print(f"  Could not format date column {col}: {str(e)}")
-                        
-                        # Filter for escalation paths
-                        if 'Escalation Path' in df_selected.columns:
-                            filtered_df = df_selected[df_selected['Escalation Path'].isin([
-                                'Market/PHO Escalation',
-                                'Practice Escalation'
-                            ])]
-                            
-                            if len(filtered_df) > 0:
-                                # Group by MarketCode
-                                for market_code in filtered_df['MarketCode'].unique():
-                                    if pd.isna(market_code):
-                                        continue
-                                        
-                                    market_df = filtered_df[filtered_df['MarketCode'] == market_code]
-                                    
-                                    if market_code in market_dfs:
-                                        market_dfs[market_code] = pd.concat([market_dfs[market_code], market_df])
-                                    else:
-                                        market_dfs[market_code] = market_df
-                                        
-                                print(f"  Successfully processed sheet '{sheet_name}' with {len(filtered_df)} records.")
-                            else:
-                                print(f"  No matching escalations found in sheet '{sheet_name}'")
-                        else:
-                            print(f"  'Escalation Path' column not found in sheet '{sheet_name}'")
-                    
-                    except Exception as e:
-                        print(f"  Error processing sheet '{sheet_name}': {str(e)}")
-                
-                print(f"Completed processing file: {file_path.name}")
-                
-            except Exception as e:
-                print(f"Error processing file {file_path.name}: {str(e)}")
-                import traceback
-                print(traceback.format_exc())
+        if self.max_workers > 1 and len(excel_files) > 1:
+            filtered_frames = self._process_files_in_workers(excel_files, desired_columns, date_columns)
+        else:
+            for file_path in excel_files:
+                filtered_frames.extend(self.process_file(file_path, desired_columns, date_columns))
+
+        market_dfs = self.partition_by_market(filtered_frames)
 
         # Print summary of data collected
         print("\nData collection summary:")
@@ -472,21 +487,167 @@ class WorklistAnalyzer:
             total_records += records
             print(f"  Market {market_code}: {records} records")
         print(f"Total records collected: {total_records}")
-        
-        return market_dfs
+
+        if self.file_parse_times:
+            print("\nWorkbook parse times:")
+            for file_name, seconds in self.file_parse_times.items():
+                print(f"  {file_name}: {seconds:.2f}s")
+            print(f"Total parse time: {sum(self.file_parse_times.values()):.2f}s")
+        print(f"Header resolver: {self.header_resolver.stats['hits']} hit(s), {self.header_resolver.stats['misses']} miss(es)")
+
+        self._week_cache[self.current_date] = (signature, market_dfs)
+        return {market_code: df.copy() for market_code, df in market_dfs.items()}
     
+    def process_file(self, file_path, desired_columns, date_columns):
+        """
+        Read every sheet of one worklist file and return its filtered escalation frames
+
+        Args:
+            file_path (Path): Path to the Excel file
+            desired_columns (list): Column names to keep, in order
+            date_columns (list): Columns to format as dates
+
+        Returns:
+            list: One filtered DataFrame per sheet with matching escalations
+        """
+        filtered_frames = []
+        try:
+            print(f"\nProcessing file: {file_path.name}")
+
+            # Process each sheet (the workbook is opened and parsed only once)
+            sheets_seen = 0
+            required_columns = ['Escalation Path', 'MarketCode']
+            for sheet_name, df in self.iter_workbook_sheets(file_path, desired_columns, required_columns):
+                sheets_seen += 1
+                try:
+                    print(f"  Reading sheet: {sheet_name}")
+
+                    # If sheet is empty, skip it
+                    if df.empty:
+                        print(f"  Sheet '{sheet_name}' is empty, skipping.")
+                        continue
+
+                    # Find the correct column names (case-insensitive); streamed sheets were resolved while reading
+                    resolved = df.attrs.get('resolved')
+                    if resolved is None:
+                        df.columns = [col.strip() if isinstance(col, str) else col for col in df.columns]
+                        resolved = self.header_resolver.resolve(df.columns, desired_columns, required_columns)
+                    column_mapping = resolved['mapping']
+
+                    # If essential columns are missing, skip this sheet
+                    missing_required = resolved['missing_required']
+
+                    if missing_required:
+                        print(f"  Sheet '{sheet_name}' is missing required columns: {missing_required}, skipping.")
+                        continue
+
+                    # Select and reorder columns that exist in the file
+                    available_columns = [col for col in desired_columns if col in column_mapping.keys()]
+
+                    # If no available columns match, skip this sheet
+                    if not available_columns:
+                        print(f"  Sheet '{sheet_name}' has no matching columns, skipping.")
+                        continue
+
+                    # Select only columns that exist in the file
+                    df_selected = df[[column_mapping[col] for col in available_columns]]
+
+                    # Rename columns to desired names
+                    df_selected.columns = available_columns
+
+                    # Format date columns ('excel' mode keeps datetime64 and formats at write time)
+                    for col in date_columns:
+                        if col in df_selected.columns:
+                            try:
+                                df_selected[col] = pd.to_datetime(df_selected[col], errors='coerce')
+                                if self.date_mode != 'excel':
+                                    df_selected[col] = df_selected[col].dt.strftime('%m/%d/%Y')
+                            except Exception as e:
+                                print(f"  Could not format date column {col}: {str(e)}")
+
+                    # Filter for escalation paths
+                    if 'Escalation Path' in df_selected.columns:
+                        filtered_df = df_selected[df_selected['Escalation Path'].isin([
+                            'Market/PHO Escalation',
+                            'Practice Escalation'
+                        ])]
+
+                        if len(filtered_df) > 0:
+                            # Collected here, grouped by MarketCode once all files are read
+                            filtered_frames.append(filtered_df)
+                            print(f"  Successfully processed sheet '{sheet_name}' with {len(filtered_df)} records.")
+                        else:
+                            print(f"  No matching escalations found in sheet '{sheet_name}'")
+                    else:
+                        print(f"  'Escalation Path' column not found in sheet '{sheet_name}'")
+
+                except Exception as e:
+                    print(f"  Error processing sheet '{sheet_name}': {str(e)}")
+
+            if not sheets_seen:
+                print(f"No valid sheets found in: {file_path.name}")
+                return filtered_frames
+
+            print(f"Completed processing file: {file_path.name} "
+                  f"(parsed in {self.file_parse_times.get(file_path.name, 0):.2f}s)")
+
+        except Exception as e:
+            print(f"Error processing file {file_path.name}: {str(e)}")
+            import traceback
+            print(traceback.format_exc())
+        return filtered_frames
+
+    def _process_files_in_workers(self, excel_files, desired_columns, date_columns):
+        """
+        Run process_file for each file in a pool of max_workers processes
+
+        Each file's printed output is replayed in file order, and its parse time and
+        header resolver counts are added to this analyzer's.
+
+        Returns:
+            list: The filtered frames of every file, in file order
+        """
+        filtered_frames = []
+        settings = {'reader_mode': self.reader_mode, 'date_mode': self.date_mode}
+        workers = min(self.max_workers, len(excel_files))
+        print(f"\nProcessing {len(excel_files)} files in {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_process_file_in_worker, settings, file_path, desired_columns, date_columns)
+                       for file_path in excel_files]
+            for file_path, future in zip(excel_files, futures):
+                try:
+                    frames, log, parse_seconds, header_stats = future.result()
+                except Exception as e:  # Worker process died
+                    print(f"\nProcessing file: {file_path.name}")
+                    print(f"Error processing file {file_path.name}: {str(e)}")
+                    continue
+                print(log, end='')
+                self.file_parse_times[file_path.name] = parse_seconds
+                for name, count in header_stats.items():
+                    self.header_resolver.stats[name] += count
+                filtered_frames.extend(frames)
+        return filtered_frames
+
+    def apply_date_format(self, worksheet, df):
+        """Give the datetime columns of df (written without index) the EXCEL_DATE_FORMAT number format"""
+        date_columns = [position + 1 for position, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
+        format_date_cells(worksheet, date_columns, len(df), self.EXCEL_DATE_FORMAT)
+
+    def fit_column_widths(self, df, max_width=None, index=False, scale=1.1):
+        """Auto-fit widths for df as written to a sheet, using width_sample_rows and date_mode"""
+        return fit_column_widths(df, max_width, index, scale, sample_rows=self.width_sample_rows,
+                                 date_format=self.EXCEL_DATE_FORMAT if self.date_mode == 'excel' else None)
+
     def create_market_files(self, market_dfs):
         """Create separate files for each market with pivot tables"""
         if not market_dfs:
             print("No data available to create files")
             return
 
-        next_monday = self.get_next_monday()
-        this_monday = self.get_this_monday()
-
         for market_code, df in market_dfs.items():
             try:
-                filename = f"{this_monday} {market_code} Med Adherence Escalations.xlsx"
+                # Named after the processed week, so several weeks can be written to one folder
+                filename = f"{self.current_date} {market_code} Med Adherence Escalations.xlsx"
                 file_path = self.output_folder / filename
 
                 print(f"\nProcessing market: {market_code}")
@@ -503,14 +664,10 @@ class WorklistAnalyzer:
 
                     # Format Raw Data sheet
                     worksheet = writer.sheets[f"{market_code}"]
-                    for idx, column in enumerate(df.columns):
-                        col_letter = get_column_letter(idx + 1)
-                        max_length = max(
-                            df[column].astype(str).apply(len).max(),
-                            len(str(column))
-                        )
-                        adjusted_width = (max_length + 2) * 1.2
-                        worksheet.column_dimensions[col_letter].width = adjusted_width
+                    if self.date_mode == 'excel':
+                        self.apply_date_format(worksheet, df)
+                    for idx, width in enumerate(self.fit_column_widths(df, scale=1.2)):
+                        worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
 
                     # Pivot Tables
                     for pivot_name, pivot_df in pivot_tables.items():
@@ -520,17 +677,8 @@ class WorklistAnalyzer:
 
                         # Format pivot sheets
                         pivot_worksheet = writer.sheets[sheet_name]
-                        for column in pivot_worksheet.columns:
-                            max_length = 0
-                            column = [cell for cell in column]
-                            try:
-                                max_length = max(
-                                    len(str(cell.value)) for cell in column if cell.value
-                                )
-                            except:
-                                pass
-                            adjusted_width = (max_length + 2)
-                            pivot_worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+                        for idx, width in enumerate(self.fit_column_widths(pivot_df, index=True, scale=1)):
+                            pivot_worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
     
                 print(f"Successfully created file: {file_path}")
                 if 'Practice_Escalations' in pivot_tables:
@@ -545,34 +693,99 @@ class WorklistAnalyzer:
                 import traceback
                 print(traceback.format_exc())
 
+    def run_week(self, date_str, markets=None):
+        """
+        Process one week's worklists and create the market files. Resolved headers and the
+        weeks read so far stay on this analyzer, so later calls in the same process (another
+        market subset, or the same week again) reuse them. Files are named after the week.
+
+        Args:
+            date_str (str): Date string in 'MM.DD' format (e.g., '4.21')
+            markets (list): Market codes to create files for (default: self.markets, None = all)
+        """
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        self.set_date(date_str)
+
+        # Process worklists for the specified date
+        market_dfs = self.process_worklists()
+
+        markets = markets if markets is not None else self.markets
+        if markets is not None:
+            requested = [str(market_code).strip() for market_code in markets]
+            market_dfs = {market_code: df for market_code, df in market_dfs.items() if str(market_code) in requested}
+            print(f"Creating files for selected markets: {list(market_dfs.keys())}")
+
+        if market_dfs:
+            self.create_market_files(market_dfs)
+            print("Processing complete!")
+        else:
+            print("No data was found to process")
+        return market_dfs
+
+
+_pyplot = None  # matplotlib.pyplot, imported by the first chart drawn (see _get_pyplot)
+
+
+def _get_pyplot():
+    """
+    Import pyplot on the off-screen Agg backend, selecting the backend only once per process
+
+    Returns:
+        module: matplotlib.pyplot
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    return _pyplot
 
-def main():
-    # Replace these with your actual paths
+
+def _process_file_in_worker(settings, file_path, desired_columns, date_columns):
+    """
+    Process-pool entry point for WorklistAnalyzer._process_files_in_workers: run process_file
+    with an analyzer configured from settings. Returns (frames, log, parse_seconds, header_stats).
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        analyzer = WorklistAnalyzer()
+        for name, value in settings.items():
+            setattr(analyzer, name, value)
+        frames = analyzer.process_file(file_path, desired_columns, date_columns)
+    return frames, log.getvalue(), analyzer.file_parse_times.get(file_path.name, 0.0), analyzer.header_resolver.stats
+
+
+def main(argv=None):
+    # Replace these with your actual paths (or pass --base-path / --output-folder)
     BASE_PATH = r"C:/Users/pcastillo/OneDrive - VillageMD\Documents - VMD- Quality Leadership- PHI/Med Adherence Exception File Worklists/"
     OUTPUT_FOLDER = r"C:/Users/pcastillo/OneDrive - VillageMD\Documents - VMD- Quality Leadership- PHI/Data Updates/MedAdhData Dropzone/Output/EscalationsDropZone/"
     #OUTPUT_FOLDER = r"C:/Users/pcastillo/OneDrive - VillageMD\Desktop/Escalation Python/"
-    
+
+    parser = argparse.ArgumentParser(description="Create the Med Adherence escalation files for each market.")
+    parser.add_argument('--dates', nargs='+', default=["4.21"], metavar='MM.DD',
+                        help='week folder date(s), processed in order in one process (default: %(default)s)')
+    parser.add_argument('--markets', nargs='+', metavar='CODE', help='only create files for these market codes (default: all)')
+    parser.add_argument('--base-path', default=BASE_PATH, help='folder holding the "Week of" worklist folders')
+    parser.add_argument('--output-folder', default=OUTPUT_FOLDER, help='folder the files and charts are written to')
+    parser.add_argument('--date-mode', choices=['text', 'excel'], default='text')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes for reading the worklist files (default: %(default)s)')
+    args = parser.parse_args(argv)
+
     try:
         # Initialize analyzer and set paths
         analyzer = WorklistAnalyzer()
-        analyzer.base_path = Path(BASE_PATH)
-        analyzer.output_folder = Path(OUTPUT_FOLDER)
-        analyzer.output_folder.mkdir(parents=True, exist_ok=True)
-        
-        # Set the date you're interested in
-        analyzer.set_date("4.21")  
-        
-        # Process worklists for the specified date
-        market_dfs = analyzer.process_worklists()
-        
-        if market_dfs:
-            analyzer.create_market_files(market_dfs)
-            print("Processing complete!")
-        else:
-            print("No data was found to process")
+        analyzer.base_path = Path(args.base_path)
+        analyzer.output_folder = Path(args.output_folder)
+        analyzer.date_mode = args.date_mode
+        analyzer.markets = args.markets
+        analyzer.max_workers = args.workers
+
+        # One analyzer for every date, so resolved headers and read weeks carry over
+        for date_str in args.dates:
+            analyzer.run_week(date_str)
     except Exception as e:
         print(f"Main execution error: {str(e)}")
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,22 +1,82 @@
 import pandas as pd
-# import matplotlib as plt # Keep commented if not strictly needed
-import seaborn as sns # Keep commented if not strictly needed
+import numpy as np
 import os
-import matplotlib.pyplot as plt # Needed for create_practice_visualization
 import re # Import regular expressions module
+import hashlib
+import argparse
+import json
+import io
+import contextlib
+import time
+import sqlite3
+import sys
+import platform
+import tracemalloc
 
 from datetime import datetime, timedelta
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import warnings
 from openpyxl.utils import get_column_letter
 from openpyxl import load_workbook
-from openpyxl.drawing.image import Image as ExcelImage # Import specifically
+from worklist_sheets import HeaderResolver, fit_column_widths, format_date_cells, project_sheet_rows, renamed_resolution
+# matplotlib and openpyxl's image support are imported only when a chart is produced (see
+# PracticeChartRenderer and _insert_image_to_excel), so runs without charts start faster
 
 warnings.simplefilter(action='ignore', category=UserWarning)
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 class WorklistAnalyzer:
 
+    CACHE_VERSION = 1 # Bump when the cleaning logic changes so old cache entries are ignored
+    REPORT_VERSION = 1 # Bump when the report layout changes so the output manifest rebuilds every market
+
+    EXCEL_DATE_FORMAT = 'mm/dd/yyyy' # Cell number format for date columns when date_mode is 'excel'
+
+    # Worklist file types, preferred first when one worklist is exported in several of them
+    WORKLIST_FORMATS = ['parquet', 'csv', 'xlsx', 'xls']
+
+    # 'Week of M.D' / 'Week of MM.DD' folder names, optionally with a year ('Week of 12.29.2025' or '.25')
+    WEEK_FOLDER_PATTERN = re.compile(r"Week of (\d{1,2})\.(\d{1,2})(?:\.(\d{4}|\d{2}))?(?!\d)")
+
+    # Full columns for main analysis
+    FULL_COLUMNS = [
+        'LastImpactableDate','PatientName','DateOfBirth','PracticeName','PCP',
+        'Rx Status','Call Disposition','QS Notes','Current Barrier','Action',
+        'Escalation Path','Escalation Timeframe','Escalation Deadline',
+        'Escalation Resolution','PayerCode','MarketCode','PayerMemberId',
+        'PatientPhoneNumber','PatientAddress','DataAsOfDate','EMR ID','United Flag',
+        'MedAdherenceMeasureCode','NDCDesc','Impact Category','Gap Priority',
+        'PDCNbr','ADRNbr','DaysMissedNbr','Total Fills Column?', # Check actual name if causing issues
+        'Initial Fill Date','LastFillDate','NextFillDate','DrugDispensedQuantityNbr',
+        'DrugDispensedDaysSupplyNbr','Last Activity Date','Task Status', # Check actual name
+        'OneFillCode','PrescriberNPI','PrescribingName','Prescriber Phone Number',
+        'PharmacyStoreName','PharmacyCommunicationNumberText'
+    ]
+
+    # Low-cardinality text columns held as categoricals once the week is partitioned by market
+    CATEGORY_COLUMNS = [
+        'PracticeName','PCP','MarketCode','PayerCode','Escalation Path','Escalation Resolution',
+        'Rx Status','Call Disposition','Current Barrier','Action','United Flag','MedAdherenceMeasureCode',
+        'Impact Category','Gap Priority','Task Status','OneFillCode','Gap Completed','PharmacyStoreName'
+    ]
+
+    # Numeric measures downcast to the smallest dtype that holds every value exactly
+    NUMERIC_COLUMNS = [
+        'PDCNbr','ADRNbr','DaysMissedNbr','Total Fills Column?','DrugDispensedQuantityNbr','DrugDispensedDaysSupplyNbr'
+    ]
+
+    # Minimal columns needed for WoW comparison
+    COMPARISON_COLUMNS = [
+        'PayerMemberId', 'MarketCode', 'PracticeName', 'PCP',
+        'Escalation Path', 'Escalation Resolution', 'Gap Completed',
+        'PatientName' # Added PatientName for context in WoW lists
+    ]
+
+    # Columns a worklist must have to be processed
+    REQUIRED_COLUMNS = ['Escalation Path', 'MarketCode', 'PayerMemberId']
+
     def __init__(self):
         """ Initialize the WorklistAnalyzer """
         self.base_path = None
@@ -24,12 +84,43 @@ class WorklistAnalyzer:
         self.current_date = None # Format 'MM.DD'
         self.previous_date = None # Format 'MM.DD'
         self.current_year = datetime.now().year
+        self._week_year = None # Year of the current week when its folder name gives one (else current_year)
+        self.reader_mode = 'streaming' # 'streaming' (read-only, projected columns) or 'pandas'
+        self.cache_folder = None # Folder for the Parquet cache of cleaned worklists (None disables it)
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self.discovery_stats = {'listings': 0, 'listing_seconds': 0.0, 'listing_hits': 0, 'index_builds': 0, 'index_hits': 0,
+                                'year_fallbacks': 0} # year_fallbacks: weeks resolved to a folder naming another year
+        self._week_folder_index = None # (base_path, {(month, day): [week folder, ...]}), see _get_week_folder_index
+        self._folder_listings = {} # Folder path -> [(name, is_dir), ...] from one directory listing
+        self.history_db = None # SQLite file storing each processed week's comparison rows (None disables it)
+        self.max_workers = 1 # >1 parses worklist files in a process pool
+        self.report_workers = 1 # >1 builds market reports in a process pool
+        self.writer_engine = 'openpyxl' # Report backend: 'openpyxl' or 'xlsxwriter' (constant_memory streaming)
+        self.date_mode = 'text' # Date columns: 'text' (mm/dd/yyyy strings) or 'excel' (datetime64 written as real dates)
+        self.chart_preset = 'print' # Practice chart DPI / size preset, see CHART_PRESETS
+        self.width_sample_rows = 100000 # Longer sheets are auto-fitted from an evenly spaced sample (None = every row)
+        self.columnar_outputs = False # Also write each market's data, pivots and WoW lists as Parquet plus a summary JSON
+        self._cache_index = None
+        self.header_resolver = HeaderResolver() # Memoized header -> column resolutions of this run
+        self.current_market_dfs_comp = None # WoW view projected from the current week's full data
+        self._comparison_view_date = None
+        self.markets = None # Market codes to build reports for (None = every market found)
+        self.week_cache_size = 3 # Parsed weeks kept in memory for later run_week calls (0 disables it)
+        self._week_cache = {} # (week 'MM.DD', is_comparison_data) -> (source signature, market frames)
+        self.run_report = True # run_week writes '<MM.DD> Run Report.json' next to the reports
+        self.trace_memory = False # Also measure each stage's peak Python allocations with tracemalloc (slower)
+        self.recorder = RunRecorder() # Timing / memory records of the current run, see RunRecorder
+        self.force_rebuild = False # Rebuild every market report even when the output manifest says it is up to date
+        self._week_inputs = {} # Week 'MM.DD' -> worklist files (name, size, mtime) it was read from
+        self.keep_file_frames = False # Keep each file's loaded frame in memory and reuse it while the file is unchanged (watch mode)
+        self._file_frames = {} # (file path, is_comparison_data) -> (source, filtered_df, records_scanned)
 
     def set_date(self, date_str):
         """ Set current date ('MM.DD') and calculate previous date. """
         try:
             datetime.strptime(date_str, '%m.%d') # Validate format
             self.current_date = date_str
+            self._week_year = None
             print(f"Current week date set to: {self.current_date}")
 
             current_dt_obj_for_calc = datetime.strptime(f"{self.current_year}.{date_str}", '%Y.%m.%d')
@@ -56,47 +147,100 @@ class WorklistAnalyzer:
         next_monday = ref_date + timedelta(days=days_ahead)
         return next_monday.strftime('%m.%d')
 
+    def refresh_discovery(self):
+        """ Forget the cached directory listings and week folder index, so new folders and files are seen. """
+        self._week_folder_index = None
+        self._folder_listings = {}
+
+    def _list_folder(self, folder_path):
+        """
+        A folder's entries as (name, is_dir) pairs. Each folder is listed once (os.scandir, which
+        gets the entry types without a stat per entry) until refresh_discovery is called; listing
+        counts and time go to discovery_stats and a 'listing' record.
+        """
+        folder_path = Path(folder_path)
+        if folder_path in self._folder_listings:
+            self.discovery_stats['listing_hits'] += 1
+            return self._folder_listings[folder_path]
+        with self.recorder.record('listing', str(folder_path)) as entry:
+            with os.scandir(folder_path) as entries:
+                listing = [(item.name, item.is_dir()) for item in entries]
+            entry['entries'] = len(listing)
+        self.discovery_stats['listings'] += 1
+        self.discovery_stats['listing_seconds'] += entry['wall_seconds']
+        self._folder_listings[folder_path] = listing
+        return listing
+
+    def _get_week_folder_index(self):
+        """
+        Index of the 'Week of' folders in base_path by (month, day), parsed from one listing.
+        Each entry holds the folder's path, name, year (None when the name has none) and whether
+        its date is written MM.DD. Rebuilt when base_path changes or after refresh_discovery.
+        """
+        base_path = Path(self.base_path)
+        if self._week_folder_index is not None and self._week_folder_index[0] == base_path:
+            self.discovery_stats['index_hits'] += 1
+            return self._week_folder_index[1]
+        index = {}
+        for name, is_dir in self._list_folder(base_path):
+            match = self.WEEK_FOLDER_PATTERN.search(name) if is_dir else None
+            if match is None:
+                continue
+            month, day, year = match.groups()
+            try:
+                datetime(2000, int(month), int(day)) # Leap year, so 2.29 folders are kept
+            except ValueError:
+                continue
+            index.setdefault((int(month), int(day)), []).append({
+                'path': base_path / name, 'name': name,
+                'year': (int(year) + 2000 if len(year) == 2 else int(year)) if year else None,
+                'padded': len(month) == 2 and len(day) == 2})
+        self._week_folder_index = (base_path, index)
+        self.discovery_stats['index_builds'] += 1
+        print(f"Indexed {sum(len(folders) for folders in index.values())} week folder(s) in {base_path}")
+        return index
+
     def find_week_folder_by_date(self, date_str_mm_dd):
-        """ Find a folder matching 'Week of' and the date (MM.DD or M.D)."""
+        """
+        Find the 'Week of' folder for a date ('MM.DD') in the week folder index. The week's year
+        comes from _week_key (the previous week may fall in the year before the current week's).
+        Folders naming that year, then folders naming no year, then MM.DD names are preferred;
+        when only folders naming other years exist, the newest of them is used. A year found in
+        the current week's folder name becomes the current week's year, so the previous week
+        (e.g. 12.22 for 12.29) is looked up in that same year.
+        """
         if not self.base_path or not self.base_path.exists():
             print(f"Base path does not exist or not set: {self.base_path}")
             return None
         try:
-             # Use a dummy year like 2000 for parsing just MM.DD
-             dt_obj = datetime.strptime(f"2000.{date_str_mm_dd}", '%Y.%m.%d')
-             date_str_m_d = f"{dt_obj.month}.{dt_obj.day}"
+            week_date = datetime.strptime(self._week_key(date_str_mm_dd), '%Y-%m-%d')
         except ValueError:
-             print(f"Warning: Could not parse date '{date_str_mm_dd}' to create M.D format.")
-             date_str_m_d = None
-
-        search_pattern_mm_dd = f"Week of {date_str_mm_dd}"
-        search_pattern_m_d = f"Week of {date_str_m_d}" if date_str_m_d else None
-        print(f"Searching for folders like: '{search_pattern_mm_dd}' OR '{search_pattern_m_d}'")
-
-        matching_folders = []
-        for folder in self.base_path.iterdir():
-            if folder.is_dir():
-                # Prioritize exact match if both might exist (e.g., Week of 10.1 vs Week of 1.10)
-                if search_pattern_mm_dd in folder.name:
-                    matching_folders.append({'path': folder, 'priority': 1, 'name': folder.name})
-                    print(f"  Found potential match (MM.DD): {folder.name}")
-                elif search_pattern_m_d and search_pattern_m_d in folder.name:
-                     matching_folders.append({'path': folder, 'priority': 2, 'name': folder.name})
-                     print(f"  Found potential match (M.D): {folder.name}")
+            print(f"Warning: Could not parse date '{date_str_mm_dd}' to find its week folder.")
+            return None
 
+        candidates = self._get_week_folder_index().get((week_date.month, week_date.day), [])
+        matching_folders = [folder for folder in candidates if folder['year'] in (None, week_date.year)]
+        if not matching_folders and candidates:
+            newest_year = max(folder['year'] for folder in candidates)
+            matching_folders = [folder for folder in candidates if folder['year'] == newest_year]
+            self.discovery_stats['year_fallbacks'] += 1
+            print(f"No folder for {date_str_mm_dd} names {week_date.year}; using the newest year found ({newest_year}).")
         if not matching_folders:
-            print(f"No folder found containing pattern: '{search_pattern_mm_dd}' or '{search_pattern_m_d}'")
+            print(f"No 'Week of' folder found for {date_str_mm_dd} ({week_date.strftime('%Y-%m-%d')})")
             return None
 
-        # Sort by priority (prefer MM.DD match) then by name
-        matching_folders.sort(key=lambda x: (x['priority'], x['name']))
-
+        matching_folders.sort(key=lambda x: (x['year'] is None, not x['padded'], x['name']))
         if len(matching_folders) > 1:
-            print(f"Warning: Multiple folders found matching patterns. Using the best match: {matching_folders[0]['name']}")
+            print(f"Warning: Multiple folders found for {date_str_mm_dd}: {[x['name'] for x in matching_folders]}. "
+                  f"Using the best match: {matching_folders[0]['name']}")
 
-        found_folder = matching_folders[0]['path']
-        print(f"Selected folder: {found_folder.name}")
-        return found_folder
+        found = matching_folders[0]
+        if date_str_mm_dd == self.current_date and found['year'] is not None and found['year'] != self._week_year:
+            self._week_year = found['year']
+            self.previous_date = (datetime(found['year'], week_date.month, week_date.day) - timedelta(days=7)).strftime('%m.%d')
+            print(f"Week {date_str_mm_dd} is in {found['year']} (from its folder name); previous week: {self.previous_date}")
+        print(f"Selected folder: {found['path'].name}")
+        return found['path']
 
     def get_week_folder(self, date_to_find_mm_dd):
         """ Get the week folder path for a specific date ('MM.DD')"""
@@ -111,16 +255,17 @@ class WorklistAnalyzer:
 
     def find_excel_files_in_folder(self, folder_path, date_str_mm_dd):
         """
-        Find Excel files within the folder that match the pattern
-        'MM.DD [MarketName] Med Adherence Escalations.xlsx' for the given date.
+        Find worklist files within the folder that match the pattern
+        'MM.DD [MarketName] Med Adherence Escalations.<xlsx|xls|csv|parquet>' for the given date.
+        When one worklist is there in several formats, only the first in WORKLIST_FORMATS is used.
         """
         if not folder_path or not folder_path.exists():
             print(f"Folder not found or not specified: {folder_path}")
             return []
 
         found_files = []
-        # Regex: Start, escaped date, space, any chars (market), fixed string, .xlsx or .xls, end
-        pattern_str = rf"^{re.escape(date_str_mm_dd)} .+ Med Adherence Escalations\.(xlsx|xls)$"
+        # Regex: Start, escaped date, space, any chars (market), fixed string, a WORKLIST_FORMATS extension, end
+        pattern_str = rf"^{re.escape(date_str_mm_dd)} .+ Med Adherence Escalations\.({'|'.join(self.WORKLIST_FORMATS)})$"
         try:
             file_pattern = re.compile(pattern_str, re.IGNORECASE)
             print(f"Searching for files in '{folder_path.name}' matching pattern: '{pattern_str}'")
@@ -128,16 +273,27 @@ class WorklistAnalyzer:
              print(f"Error compiling regex pattern '{pattern_str}': {e}. Cannot search for files.")
              return []
 
-        for item in folder_path.iterdir():
-            if item.is_file() and not item.name.startswith('~'):
-                if file_pattern.match(item.name):
-                    found_files.append(item)
-                    print(f"  Found matching file: {item.name}")
+        for name, is_dir in self._list_folder(folder_path):
+            if not is_dir and not name.startswith('~'):
+                if file_pattern.match(name):
+                    found_files.append(folder_path / name)
+                    print(f"  Found matching file: {name}")
 
         if not found_files:
             print(f"No files found in '{folder_path.name}' matching the pattern for date {date_str_mm_dd}.")
             return []
 
+        preferred = {} # Lower-cased stem -> the file in the most preferred format
+        for file_path in found_files:
+            rank = self.WORKLIST_FORMATS.index(file_path.suffix.lower()[1:])
+            current = preferred.get(file_path.stem.lower())
+            if current is None or rank < self.WORKLIST_FORMATS.index(current.suffix.lower()[1:]):
+                preferred[file_path.stem.lower()] = file_path
+        if len(preferred) < len(found_files):
+            duplicates = [file_path.name for file_path in found_files if file_path not in preferred.values()]
+            print(f"  Same worklist in several formats; ignoring: {duplicates}")
+            found_files = [file_path for file_path in found_files if file_path in preferred.values()]
+
         print(f"Found {len(found_files)} matching file(s) for {date_str_mm_dd} in: {folder_path.name}")
         return found_files
 
@@ -167,150 +323,759 @@ class WorklistAnalyzer:
                      print(f"  data_only=False: {str(e2)}")
                      return None
 
+    def read_excel_projected(self, file_path, desired_columns):
+        """ Stream the first sheet with openpyxl's read-only row iterator, materializing only desired_columns. """
+        workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            worksheet = workbook.worksheets[0]
+            with self.recorder.record('sheet', worksheet.title, file=file_path.name) as entry:
+                worksheet.reset_dimensions()
+                df = project_sheet_rows(worksheet.iter_rows(values_only=True), self.header_resolver,
+                                        desired_columns, self.REQUIRED_COLUMNS)
+                entry.update(rows_out=len(df), columns=len(df.columns))
+            return df
+        finally:
+            workbook.close()
+
+    def read_columnar_projected(self, file_path, desired_columns):
+        """
+        Read a CSV (pyarrow's multithreaded CSV reader) or Parquet worklist, materializing only
+        the columns that resolve to desired_columns. Empty cells come back as NaN, like a workbook's.
+        Exports hold PayerMemberId as text when some ids are not numeric; the numeric ones are
+        turned back into integers so they match the same members read from an Excel worklist.
+        """
+        suffix = file_path.suffix.lower()
+        with self.recorder.record('sheet', file_path.name, file=file_path.name, format=suffix[1:]) as entry:
+            if suffix == '.parquet':
+                import pyarrow.parquet as pq
+                header = pq.read_schema(file_path).names
+            else:
+                import pyarrow.csv as pa_csv
+                with pa_csv.open_csv(file_path) as reader:
+                    header = reader.schema.names
+            resolved = self.header_resolver.resolve(header, desired_columns, self.REQUIRED_COLUMNS)
+            if not resolved['positions']:
+                return pd.DataFrame(columns=header)
+            columns = [header[idx] for idx in resolved['positions']]
+            if suffix == '.parquet':
+                table = pq.read_table(file_path, columns=columns)
+            else:
+                table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(
+                    include_columns=columns, strings_can_be_null=True))
+            df = table.to_pandas()
+            df.columns = resolved['names']
+            df.attrs['resolved'] = renamed_resolution(resolved)
+            for col in df.columns[df.dtypes == object]:
+                df[col] = df[col].where(df[col].notna(), float('nan'))
+            id_col = 'PayerMemberId'
+            if id_col in df.columns and df[id_col].dtype == object:
+                ids = df[id_col].dropna()
+                numeric = ids.map(type).eq(str) & ids.str.fullmatch(r"-?[1-9][0-9]{0,17}|0").fillna(False).astype(bool)
+                if numeric.any():
+                    df.loc[numeric[numeric].index, id_col] = pd.Series(ids[numeric].astype(np.int64).tolist(),
+                                                                        index=numeric[numeric].index, dtype=object)
+            entry.update(rows_out=len(df), columns=len(df.columns))
+        return df
+
+    def read_worklist_file(self, file_path, desired_columns):
+        """ Read a worklist file using the configured reader mode, falling back to read_excel_safely. """
+        if file_path.suffix.lower() in ('.csv', '.parquet'):
+            return self.read_columnar_projected(file_path, desired_columns)
+        if self.reader_mode == 'streaming' and file_path.suffix.lower() == '.xlsx':
+            try:
+                return self.read_excel_projected(file_path, desired_columns)
+            except Exception as e:
+                print(f"  Streaming read failed for {file_path.name} ({str(e)}), falling back to full read.")
+        return self.read_excel_safely(file_path)
+
+    def _load_worklist_file(self, file_path, desired_columns, date_columns, is_comparison_data):
+        """
+        Read one worklist file and return (filtered_df, records_scanned), where filtered_df
+        holds the standardized columns for the relevant escalation rows (None if unusable).
+        """
+        df_full_file = self.read_worklist_file(file_path, desired_columns)
+        if df_full_file is None or df_full_file.empty:
+             print(f"  File {file_path.name} is empty or could not be read, skipping.")
+             return None, 0
+
+        if isinstance(df_full_file, dict): # Handle multiple sheets if necessary
+            # Basic handling: use the first sheet. Adapt if needed.
+            sheet_name = list(df_full_file.keys())[0]
+            df_sheet = df_full_file[sheet_name]
+            print(f"  Reading first sheet: '{sheet_name}' (multiple sheets found)")
+            if df_sheet.empty: return None, 0
+        else: df_sheet = df_full_file
+
+        records_scanned = len(df_sheet)
+
+        # --- Data Cleaning and Selection ---
+        resolved = df_sheet.attrs.get('resolved') # Left by the projected readers, columns already renamed
+        if resolved is None:
+            df_sheet.columns = [str(col).strip() for col in df_sheet.columns]
+            resolved = self.header_resolver.resolve(df_sheet.columns, desired_columns, self.REQUIRED_COLUMNS)
+        column_mapping = resolved['mapping'] # Map desired name to actual name
+        missing_required = resolved['missing_required']
+        if missing_required:
+            print(f"  File '{file_path.name}' missing essential columns: {missing_required}. Skipping.")
+            return None, records_scanned
+
+        available_desired_cols = list(column_mapping.keys())
+        df_selected = df_sheet[[column_mapping[col] for col in available_desired_cols]].copy()
+        df_selected.columns = available_desired_cols # Standardize column names
+
+        # Format date columns only if doing full processing ('excel' mode keeps datetime64 and formats at write time)
+        if not is_comparison_data:
+             for col in date_columns:
+                 if col in df_selected.columns:
+                     try:
+                         df_selected[col] = pd.to_datetime(df_selected[col], errors='coerce')
+                         if self.date_mode != 'excel':
+                             df_selected[col] = df_selected[col].dt.strftime('%m/%d/%Y')
+                     except Exception as date_e:
+                         print(f"    Warning: Could not format date column '{col}': {str(date_e)}")
+
+        # Filter for relevant escalation paths
+        escalation_col_name = 'Escalation Path' # Standardized name
+        filtered_df = df_selected[df_selected[escalation_col_name].isin([
+            'Market/PHO Escalation',
+            'Practice Escalation'
+        ])].copy()
+
+        if filtered_df.empty:
+            print(f"  No relevant escalations found in file '{file_path.name}'.")
+
+        return filtered_df, records_scanned
+
+    def _file_fingerprint(self, file_path):
+        """ Identify a source file by resolved path, size, mtime and a hash of its contents. """
+        stat = file_path.stat()
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return {'path': str(file_path.resolve()), 'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns, 'content_hash': digest.hexdigest()}
+
+    def _get_cache_index(self):
+        """ Load (once) the cache index mapping 'path|mode' to the current cache entry. """
+        if self._cache_index is None:
+            index_path = self.cache_folder / 'cache_index.json'
+            try:
+                with open(index_path, 'r', encoding='utf-8') as fh:
+                    self._cache_index = json.load(fh)
+            except (OSError, ValueError):
+                self._cache_index = {}
+        return self._cache_index
+
+    def _save_cache_index(self):
+        index_path = self.cache_folder / 'cache_index.json'
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self._cache_index, fh, indent=1)
+        os.replace(tmp_path, index_path)
+
+    def _encode_mixed_columns(self, df):
+        """
+        Arrow cannot store object columns mixing Python types (e.g. PayerMemberId holding both
+        'M123' and 123). Store such columns as text plus a per-row type tag so they round-trip exactly.
+        Returns (encoded_df, encoded_column_names).
+        """
+        tags = {str: 's', bool: 'b', int: 'i', float: 'f'}
+        encoded = df.copy()
+        encoded_columns = []
+        for col in df.columns[df.dtypes == object]:
+            if pd.api.types.infer_dtype(df[col], skipna=True) in ('string', 'empty'):
+                continue
+            values, kinds = [], []
+            for value in df[col]:
+                if value is None or (isinstance(value, float) and value != value):
+                    values.append(None); kinds.append('n')
+                elif isinstance(value, datetime):
+                    values.append(value.isoformat()); kinds.append('t')
+                elif type(value) in tags:
+                    values.append(str(value)); kinds.append(tags[type(value)])
+                else:
+                    raise TypeError(f"column '{col}' holds unsupported type {type(value).__name__}")
+            encoded[col] = values
+            encoded[f"__type__{col}"] = kinds
+            encoded_columns.append(col)
+        return encoded, encoded_columns
+
+    def _decode_mixed_columns(self, df, encoded_columns):
+        """ Reverse _encode_mixed_columns after reading a cached frame. """
+        parsers = {'s': str, 'i': int, 'f': float, 'b': lambda v: v == 'True', 't': pd.Timestamp}
+        for col in encoded_columns:
+            type_col = f"__type__{col}"
+            df[col] = pd.Series([float('nan') if kind == 'n' else parsers[kind](value)
+                                 for value, kind in zip(df[col], df[type_col])], index=df.index, dtype=object)
+            df = df.drop(columns=type_col)
+        return df
+
+    def _cache_lookup(self, file_path, desired_columns, date_columns, is_comparison_data):
+        """
+        Look a worklist file up in the Parquet cache. Returns (cache_context, cached_result):
+        cached_result is (filtered_df, records_scanned) on a hit and None on a miss;
+        cache_context is what _cache_store needs to record a fresh result (None if caching is off).
+        """
+        if self.cache_folder is None:
+            return None, None
+
+        try:
+            fingerprint = self._file_fingerprint(file_path)
+        except OSError as e:
+            print(f"  Could not fingerprint {file_path.name} for caching: {str(e)}")
+            return None, None
+
+        mode = 'comparison' if is_comparison_data else 'full'
+        entry_name = f"{fingerprint['path']}|{mode}"
+        key_source = {'fingerprint': fingerprint, 'columns': desired_columns,
+                      'date_columns': [] if is_comparison_data else date_columns,
+                      'version': self.CACHE_VERSION}
+        if not is_comparison_data and self.date_mode == 'excel':
+            key_source['date_mode'] = self.date_mode # Text-mode keys stay as they were
+        key = hashlib.sha256(json.dumps(key_source, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+        cache_context = {'file_path': file_path, 'entry_name': entry_name, 'key': key, 'fingerprint': fingerprint}
+
+        entry = self._get_cache_index().get(entry_name)
+        if entry and entry['key'] == key:
+            try:
+                if entry['data_file'] is None:
+                    filtered_df = None
+                else:
+                    filtered_df = pd.read_parquet(self.cache_folder / entry['data_file'])
+                    filtered_df = self._decode_mixed_columns(filtered_df, entry.get('encoded_columns', []))
+                    for col in filtered_df.columns[filtered_df.dtypes == object]:
+                        # Parquet round-trips missing strings as None; keep NaN like read_excel
+                        filtered_df[col] = filtered_df[col].where(filtered_df[col].notna(), float('nan'))
+                self.cache_stats['hits'] += 1
+                print(f"  Loaded from cache ({entry['records_scanned']} records scanned originally).")
+                return cache_context, (filtered_df, entry['records_scanned'])
+            except Exception as e:
+                print(f"  Cache entry for {file_path.name} unreadable ({str(e)}), re-reading file.")
+
+        self.cache_stats['misses'] += 1
+        return cache_context, None
+
+    def _cache_store(self, cache_context, filtered_df, records_scanned):
+        """ Store a freshly loaded worklist in the cache, replacing the file's previous entry. """
+        if cache_context is None or self.cache_folder is None:
+            return
+        file_path, key = cache_context['file_path'], cache_context['key']
+
+        data_file = None
+        encoded_columns = []
+        if filtered_df is not None:
+            data_file = f"{key}.parquet"
+            tmp_path = self.cache_folder / f"{key}.tmp"
+            try:
+                self.cache_folder.mkdir(parents=True, exist_ok=True)
+                encoded_df, encoded_columns = self._encode_mixed_columns(filtered_df)
+                encoded_df.to_parquet(tmp_path)
+                os.replace(tmp_path, self.cache_folder / data_file)
+            except ImportError:
+                print("Warning: pyarrow not installed? Disabling worklist cache. `pip install pyarrow`")
+                self.cache_folder = None
+                return
+            except Exception as e:
+                print(f"  Could not cache {file_path.name} (not stored): {str(e)}")
+                if tmp_path.exists(): tmp_path.unlink()
+                return
+
+        # Invalidate the previous entry for this file now that it has changed
+        index = self._get_cache_index()
+        entry = index.get(cache_context['entry_name'])
+        if entry and entry.get('data_file') and entry['data_file'] != data_file:
+            old_path = self.cache_folder / entry['data_file']
+            if old_path.exists(): old_path.unlink()
+        fingerprint = cache_context['fingerprint']
+        index[cache_context['entry_name']] = {'key': key, 'data_file': data_file, 'records_scanned': records_scanned,
+                                              'encoded_columns': encoded_columns,
+                                              'size': fingerprint['size'], 'mtime_ns': fingerprint['mtime_ns']}
+        try:
+            self.cache_folder.mkdir(parents=True, exist_ok=True)
+            self._save_cache_index()
+        except OSError as e:
+            print(f"  Could not update cache index: {str(e)}")
+
+    def _load_worklist_file_cached(self, file_path, desired_columns, date_columns, is_comparison_data):
+        """
+        Cached wrapper around _load_worklist_file. The cleaned output is stored as Parquet,
+        keyed by the file fingerprint and the processing options; an entry is replaced
+        as soon as its source file changes.
+        """
+        cache_context, cached = self._cache_lookup(file_path, desired_columns, date_columns, is_comparison_data)
+        if cached is not None:
+            return cached
+        filtered_df, records_scanned = self._load_worklist_file(file_path, desired_columns, date_columns, is_comparison_data)
+        self._cache_store(cache_context, filtered_df, records_scanned)
+        return filtered_df, records_scanned
+
+    def _worker_settings(self):
+        """ Analyzer settings a worker process needs to parse files / build reports exactly like this instance. """
+        return {'reader_mode': self.reader_mode, 'output_folder': self.output_folder,
+                'current_date': self.current_date, 'previous_date': self.previous_date,
+                'current_year': self.current_year, 'writer_engine': self.writer_engine,
+                'width_sample_rows': self.width_sample_rows, 'date_mode': self.date_mode,
+                'chart_preset': self.chart_preset, 'trace_memory': self.trace_memory,
+                'columnar_outputs': self.columnar_outputs}
+
+    def _iter_loaded_worklists(self, excel_files, desired_columns, date_columns, is_comparison_data):
+        """
+        Yield (file_path, filtered_df, records_scanned) for each worklist file in file order.
+        With keep_file_frames the loaded frames are also kept in memory, and files whose size
+        and mtime have not changed since are served from there instead of being loaded again.
+        """
+        load_args = (desired_columns, date_columns, is_comparison_data)
+        if not self.keep_file_frames:
+            yield from self._load_worklists(excel_files, *load_args)
+            return
+
+        sources = {}
+        for file_path in excel_files:
+            stat = file_path.stat()
+            sources[file_path] = (stat.st_size, stat.st_mtime_ns, self.reader_mode, self.date_mode)
+        kept = {file_path: self._file_frames[(file_path, is_comparison_data)][1:] for file_path in excel_files
+                if self._file_frames.get((file_path, is_comparison_data), (None,))[0] == sources[file_path]}
+        loaded = {file_path: (filtered_df, records_scanned) for file_path, filtered_df, records_scanned
+                  in self._load_worklists([file_path for file_path in excel_files if file_path not in kept], *load_args)}
+
+        folders = {file_path.parent for file_path in excel_files}
+        for key in [key for key in self._file_frames if key[1] == is_comparison_data and key[0].parent in folders]:
+            if key[0] not in loaded and key[0] not in kept: # Removed from the folder, or failed to load
+                del self._file_frames[key]
+        view = 'comparison' if is_comparison_data else 'full'
+        for file_path in excel_files:
+            if file_path in kept:
+                filtered_df, records_scanned = kept[file_path]
+                print(f"\nProcessing file: {file_path.name} (unchanged, kept in memory)")
+                with self.recorder.record('file', file_path.name, view=view, source='memory') as entry:
+                    entry.update(rows_in=records_scanned, rows_out=0 if filtered_df is None else len(filtered_df))
+            elif file_path in loaded:
+                filtered_df, records_scanned = loaded[file_path]
+                self._file_frames[(file_path, is_comparison_data)] = (sources[file_path], filtered_df, records_scanned)
+            else:
+                continue
+            yield file_path, filtered_df, records_scanned
+
+    def _load_worklists(self, excel_files, desired_columns, date_columns, is_comparison_data):
+        """
+        Load each worklist file (cache first) and yield (file_path, filtered_df, records_scanned)
+        in file order. With max_workers > 1 the cache misses are parsed in a process pool; each
+        file's log is replayed in file order, so the result and output match a serial run.
+        """
+        load_args = (desired_columns, date_columns, is_comparison_data)
+        workers = min(self.max_workers or 1, len(excel_files))
+
+        view = 'comparison' if is_comparison_data else 'full'
+        if workers <= 1:
+            for file_path in excel_files:
+                print(f"\nProcessing file: {file_path.name}")
+                hits_before = self.cache_stats['hits']
+                with self.recorder.record('file', file_path.name, view=view) as entry:
+                    try:
+                        filtered_df, records_scanned = self._load_worklist_file_cached(file_path, *load_args)
+                    except Exception as file_e:
+                        print(f"Error processing file {file_path.name}: {str(file_e)}")
+                        # import traceback # Uncomment for detailed trace
+                        # print(traceback.format_exc()) # Uncomment for detailed trace
+                        entry['error'] = str(file_e)
+                        continue
+                    entry.update(source='cache' if self.cache_stats['hits'] > hits_before else 'parsed',
+                                 rows_in=records_scanned, rows_out=0 if filtered_df is None else len(filtered_df))
+                yield file_path, filtered_df, records_scanned
+            return
+
+        # Cache lookups stay in this process (the cache index is not shared); misses go to the pool
+        lookups = {}
+        for file_path in excel_files:
+            lookup_log = io.StringIO()
+            lookup_record = (self.recorder.record('file', file_path.name, view=view) if self.cache_folder is not None
+                             else contextlib.nullcontext({})) # Without a cache there is nothing to time here
+            with contextlib.redirect_stdout(lookup_log), lookup_record as entry:
+                lookups[file_path] = self._cache_lookup(file_path, *load_args)
+                cached = lookups[file_path][1]
+                if cached is None:
+                    entry['source'] = 'lookup' # The parse itself is recorded by the worker
+                else:
+                    entry.update(source='cache', rows_in=cached[1], rows_out=0 if cached[0] is None else len(cached[0]))
+            lookups[file_path] += (lookup_log.getvalue(),)
+        misses = [file_path for file_path in excel_files if lookups[file_path][1] is None]
+        workers = min(workers, len(misses))
+        if misses:
+            print(f"\nParsing {len(misses)} file(s) in {workers} worker process(es); "
+                  f"{len(excel_files) - len(misses)} loaded from cache.")
+
+        start = time.perf_counter()
+        settings = self._worker_settings()
+        executor = ProcessPoolExecutor(max_workers=workers) if misses else None
+        try:
+            futures = {file_path: executor.submit(_load_worklist_file_in_worker, settings, file_path, *load_args)
+                       for file_path in misses}
+            for file_path in excel_files:
+                cache_context, cached, lookup_log = lookups[file_path]
+                print(f"\nProcessing file: {file_path.name}")
+                print(lookup_log, end='')
+                if cached is not None:
+                    yield (file_path, *cached)
+                    continue
+                try:
+                    try:
+                        result = futures[file_path].result()
+                    except BrokenProcessPool:
+                        # A worker died and every file still queued in the pool fails with it: retry this one
+                        # in a process of its own, so only the file that actually crashes is lost
+                        print(f"  Worker pool broke before {file_path.name} was parsed; retrying it in its own process.")
+                        with ProcessPoolExecutor(max_workers=1) as retry_executor:
+                            result = retry_executor.submit(_load_worklist_file_in_worker, settings,
+                                                           file_path, *load_args).result()
+                except Exception as file_e:
+                    print(f"Error processing file {file_path.name}: {str(file_e)}")
+                    with self.recorder.record('file', file_path.name, view=view) as entry:
+                        entry['error'] = str(file_e)
+                    continue
+                filtered_df, records_scanned, error, worker_log, header_stats, records = result
+                print(worker_log, end='')
+                for name, count in header_stats.items():
+                    self.header_resolver.stats[name] += count
+                self.recorder.records.extend(records)
+                if error is not None:
+                    print(f"Error processing file {file_path.name}: {error}")
+                    continue
+                self._cache_store(cache_context, filtered_df, records_scanned)
+                yield file_path, filtered_df, records_scanned
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        if misses:
+            print(f"\nParallel ingestion of {len(excel_files)} file(s) took {time.perf_counter() - start:.2f}s")
+
+    def _partition_by_market(self, frames):
+        """
+        Concatenate the per-file frames once and split them by (stripped) MarketCode
+        with a single groupby. Markets keep their first-appearance order and each market
+        only gets the columns present in the files it came from.
+        """
+        frames = [df for df in frames if df is not None and not df.empty]
+        if not frames:
+            return {}
+
+        combined = pd.concat(frames, ignore_index=True)
+        frame_ids = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+        market_col = combined['MarketCode'] # Standardized name
+        market_keys = market_col.astype(str).str.strip().where(market_col.notna()) # Clean market code
+
+        market_dfs = {}
+        groups = combined.groupby(market_keys, sort=False).indices
+        for market_code, positions in sorted(groups.items(), key=lambda item: item[1][0]):
+            market_df = combined.take(positions).reset_index(drop=True)
+            market_columns = []
+            for frame_id in np.unique(frame_ids[positions]):
+                market_columns.extend(col for col in frames[frame_id].columns if col not in market_columns)
+            if len(market_columns) != len(combined.columns):
+                market_df = market_df[market_columns]
+            market_dfs[market_code] = market_df
+        return market_dfs
+
+    def _compact_dtypes(self, df):
+        """
+        Convert the low-cardinality text columns to categoricals and downcast the numeric
+        measures, without changing any value: only all-text columns with mostly repeated
+        values become categories, and floats only shrink to float32 when they are whole numbers.
+        """
+        df = df.copy()
+        for col in self.CATEGORY_COLUMNS:
+            if col not in df.columns or df[col].dtype != object:
+                continue
+            values = df[col].dropna()
+            if len(values) and values.map(type).eq(str).all() and values.nunique() <= len(values) // 2:
+                df[col] = df[col].astype('category')
+        for col in self.NUMERIC_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_extension_array_dtype(values.dtype):
+                df[col] = pd.to_numeric(values, downcast='integer')
+            elif pd.api.types.is_float_dtype(values.dtype) and values.dtype != np.float32:
+                finite = values.dropna()
+                # Whole numbers up to 2**24 are exact in float32 and print the same
+                if (finite == finite.round()).all() and (finite.abs() <= 2**24).all():
+                    df[col] = values.astype(np.float32)
+        return df
+
     def _process_single_week_data(self, date_str_mm_dd, is_comparison_data=False):
         """ Processes worklist data for a single week ('MM.DD'). """
         print(f"\n--- Processing data for week of: {date_str_mm_dd} ---")
-        folder_path = self.get_week_folder(date_str_mm_dd)
+        view = 'comparison' if is_comparison_data else 'full'
+        with self.recorder.record('stage', 'discover', week=date_str_mm_dd, view=view) as entry:
+            folder_path = self.get_week_folder(date_str_mm_dd)
+            excel_files = []
+            if folder_path is not None and folder_path.exists():
+                excel_files = self.find_excel_files_in_folder(folder_path, date_str_mm_dd)
+            entry['files'] = len(excel_files)
         if folder_path is None or not folder_path.exists():
             print(f"No valid week folder found for {date_str_mm_dd}.")
             return {}
 
-        excel_files = self.find_excel_files_in_folder(folder_path, date_str_mm_dd)
         if not excel_files:
              print(f"No Excel files found to process for week {date_str_mm_dd}.")
              return {}
 
         if is_comparison_data:
-            # Minimal columns needed for WoW comparison
-            desired_columns = [
-                'PayerMemberId', 'MarketCode', 'PracticeName', 'PCP',
-                 'Escalation Path', 'Escalation Resolution', 'Gap Completed',
-                 'PatientName' # Added PatientName for context in WoW lists
-            ]
+            desired_columns = self.COMPARISON_COLUMNS
             processing_type = "WoW comparison (minimal columns)"
         else:
-            # Full columns for main analysis
-            desired_columns = [
-                 'LastImpactableDate','PatientName','DateOfBirth','PracticeName','PCP',
-                 'Rx Status','Call Disposition','QS Notes','Current Barrier','Action',
-                 'Escalation Path','Escalation Timeframe','Escalation Deadline',
-                 'Escalation Resolution','PayerCode','MarketCode','PayerMemberId',
-                 'PatientPhoneNumber','PatientAddress','DataAsOfDate','EMR ID','United Flag',
-                 'MedAdherenceMeasureCode','NDCDesc','Impact Category','Gap Priority',
-                 'PDCNbr','ADRNbr','DaysMissedNbr','Total Fills Column?', # Check actual name if causing issues
-                 'Initial Fill Date','LastFillDate','NextFillDate','DrugDispensedQuantityNbr',
-                 'DrugDispensedDaysSupplyNbr','Last Activity Date','Task Status', # Check actual name
-                 'OneFillCode','PrescriberNPI','PrescribingName','Prescriber Phone Number',
-                 'PharmacyStoreName','PharmacyCommunicationNumberText'
-             ]
+            # Full columns plus the comparison-only ones, so the WoW view can be projected from this read
+            desired_columns = self.FULL_COLUMNS + [col for col in self.COMPARISON_COLUMNS if col not in self.FULL_COLUMNS]
             processing_type = "main analysis (full columns)"
 
         print(f"Processing type: {processing_type}")
 
+        signature = self._week_signature(excel_files)
+        self._week_inputs[date_str_mm_dd] = [list(source) for source in signature[0]]
+        cached = self._cached_week(date_str_mm_dd, is_comparison_data, signature)
+        if cached is not None:
+            return cached
+
         date_columns = [
             'LastImpactableDate','DateOfBirth','LastFillDate','NextFillDate',
             'Initial Fill Date','Last Activity Date','DataAsOfDate',
             'Escalation Timeframe','Escalation Deadline'
         ]
 
-        market_dfs = {}
+        filtered_frames = [] # Collected per file, partitioned by market once at the end
         total_records_processed = 0
         total_escalations_found = 0
 
-        for file_path in excel_files:
-            print(f"\nProcessing file: {file_path.name}")
-            try:
-                df_full_file = self.read_excel_safely(file_path)
-                if df_full_file is None or df_full_file.empty:
-                     print(f"  File {file_path.name} is empty or could not be read, skipping.")
-                     continue
-
-                if isinstance(df_full_file, dict): # Handle multiple sheets if necessary
-                    # Basic handling: use the first sheet. Adapt if needed.
-                    sheet_name = list(df_full_file.keys())[0]
-                    df_sheet = df_full_file[sheet_name]
-                    print(f"  Reading first sheet: '{sheet_name}' (multiple sheets found)")
-                    if df_sheet.empty: continue
-                else: df_sheet = df_full_file
-
-                total_records_processed += len(df_sheet)
-                df_sheet.columns = [str(col).strip() for col in df_sheet.columns]
-
-                # --- Data Cleaning and Selection ---
-                column_mapping = {}
-                for desired_col in desired_columns:
-                     matches = [col for col in df_sheet.columns if str(col).lower() == desired_col.lower()]
-                     if matches: column_mapping[desired_col] = matches[0] # Map desired name to actual name
-
-                required_for_processing = ['Escalation Path', 'MarketCode', 'PayerMemberId']
-                missing_required = [col for col in required_for_processing if col not in column_mapping]
-                if missing_required:
-                    print(f"  File '{file_path.name}' missing essential columns: {missing_required}. Skipping.")
-                    continue
-
-                available_desired_cols = list(column_mapping.keys())
-                df_selected = df_sheet[[column_mapping[col] for col in available_desired_cols]].copy()
-                df_selected.columns = available_desired_cols # Standardize column names
-
-                # Format date columns only if doing full processing
-                if not is_comparison_data:
-                     for col in date_columns:
-                         if col in df_selected.columns:
-                             try:
-                                 df_selected[col] = pd.to_datetime(df_selected[col], errors='coerce').dt.strftime('%m/%d/%Y')
-                             except Exception as date_e:
-                                 print(f"    Warning: Could not format date column '{col}': {str(date_e)}")
-
-                # Filter for relevant escalation paths
-                escalation_col_name = 'Escalation Path' # Standardized name
-                filtered_df = df_selected[df_selected[escalation_col_name].isin([
-                    'Market/PHO Escalation',
-                    'Practice Escalation'
-                ])].copy()
-
-                if filtered_df.empty:
-                    print(f"  No relevant escalations found in file '{file_path.name}'.")
+        with self.recorder.record('stage', 'ingest', week=date_str_mm_dd, view=view, files=len(excel_files)) as entry:
+            for file_path, filtered_df, records_scanned in self._iter_loaded_worklists(
+                    excel_files, desired_columns, date_columns, is_comparison_data):
+                total_records_processed += records_scanned
+                if filtered_df is None or filtered_df.empty:
                     continue
 
                 total_escalations_found += len(filtered_df)
                 print(f"  Found {len(filtered_df)} relevant escalations.")
-
-                # Group by MarketCode (using standardized name)
-                market_col_name = 'MarketCode'
-                for market_code in filtered_df[market_col_name].dropna().unique():
-                    market_df = filtered_df[filtered_df[market_col_name] == market_code].copy()
-                    market_code_str = str(market_code).strip() # Clean market code
-
-                    if market_code_str in market_dfs:
-                        market_dfs[market_code_str] = pd.concat([market_dfs[market_code_str], market_df], ignore_index=True)
-                    else:
-                        market_dfs[market_code_str] = market_df
-
-            except Exception as file_e:
-                print(f"Error processing file {file_path.name}: {str(file_e)}")
-                # import traceback # Uncomment for detailed trace
-                # print(traceback.format_exc()) # Uncomment for detailed trace
+                filtered_frames.append(filtered_df)
+            entry.update(rows_in=total_records_processed, rows_out=total_escalations_found)
+
+        with self.recorder.record('stage', 'partition', week=date_str_mm_dd, view=view, rows_in=total_escalations_found) as entry:
+            market_dfs = self._partition_by_market(filtered_frames)
+            if market_dfs:
+                print("\nMarket memory (object columns -> compact dtypes):")
+                for market_code, market_df in market_dfs.items():
+                    before_mb = market_df.memory_usage(deep=True).sum() / 1024 / 1024
+                    market_dfs[market_code] = self._compact_dtypes(market_df)
+                    after_mb = market_dfs[market_code].memory_usage(deep=True).sum() / 1024 / 1024
+                    print(f"  Market {market_code}: {before_mb:.2f} MB -> {after_mb:.2f} MB")
+            entry.update(rows_out=sum(len(df) for df in market_dfs.values()), markets=len(market_dfs))
 
         print(f"\n--- Finished processing for week {date_str_mm_dd} ---")
         print(f"Total records scanned across files: {total_records_processed}")
         print(f"Total relevant escalations collected: {total_escalations_found}")
+        if self.cache_folder is not None:
+            print(f"Worklist cache: {self.cache_stats['hits']} hit(s), {self.cache_stats['misses']} miss(es)")
+        print(f"Header resolver: {self.header_resolver.stats['hits']} hit(s), {self.header_resolver.stats['misses']} miss(es)")
         print(f"Data collected for markets: {list(market_dfs.keys())}")
 
-        return market_dfs
+        self._store_cached_week(date_str_mm_dd, is_comparison_data, signature, market_dfs)
+        return {market_code: df.copy() for market_code, df in market_dfs.items()}
+
+    def _week_signature(self, excel_files):
+        """ Identify a week's inputs and the settings that shape its frames, to tell whether a cached week is stale. """
+        sources = []
+        for file_path in excel_files:
+            stat = file_path.stat()
+            sources.append((file_path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(sources), self.reader_mode, self.date_mode
+
+    def _cached_week(self, date_str_mm_dd, is_comparison_data, signature):
+        """
+        Return copies of a week's market frames parsed earlier by this analyzer, or None. The
+        comparison view is projected from the full frames when only those are cached.
+        """
+        for cached_comparison in ([True, False] if is_comparison_data else [False]):
+            entry = self._week_cache.get((date_str_mm_dd, cached_comparison))
+            if entry is None or entry[0] != signature:
+                continue
+            market_dfs = entry[1]
+            if is_comparison_data and not cached_comparison:
+                market_dfs = {market_code: self._project_columns(df, self.COMPARISON_COLUMNS)
+                              for market_code, df in market_dfs.items()}
+            print(f"Using week {date_str_mm_dd} from the in-process cache ({len(market_dfs)} market(s)); worklists not re-read.")
+            return {market_code: df.copy() for market_code, df in market_dfs.items()}
+        return None
+
+    def _store_cached_week(self, date_str_mm_dd, is_comparison_data, signature, market_dfs):
+        """ Keep a week's market frames for later calls, dropping the oldest weeks beyond week_cache_size. """
+        if not self.week_cache_size or not market_dfs:
+            return
+        key = (date_str_mm_dd, is_comparison_data)
+        self._week_cache.pop(key, None)
+        self._week_cache[key] = (signature, market_dfs) # Callers get copies, so these stay untouched
+        while len(self._week_cache) > self.week_cache_size:
+            del self._week_cache[next(iter(self._week_cache))]
+
+    def _project_columns(self, df, columns):
+        """ Return df restricted to the given columns (in that order) that it actually has. """
+        available = [col for col in columns if col in df.columns]
+        if available == list(df.columns):
+            return df
+        return df[available].copy()
 
     def process_worklists(self):
-        """ Wrapper to process the main worklist data for the current set date. """
+        """
+        Wrapper to process the main worklist data for the current set date.
+        The WoW comparison view of the same week is projected from the loaded frames
+        and kept in self.current_market_dfs_comp, so the week is only read once.
+        """
         if not self.current_date:
              print("Error: Current date not set. Cannot process worklists.")
              return {}
-        return self._process_single_week_data(self.current_date, is_comparison_data=False)
+        market_dfs = self._process_single_week_data(self.current_date, is_comparison_data=False)
+        self.current_market_dfs_comp = {market_code: self._project_columns(df, self.COMPARISON_COLUMNS)
+                                        for market_code, df in market_dfs.items()}
+        self._comparison_view_date = self.current_date
+        if self.history_db is not None and market_dfs:
+            self.store_week_history(self.current_date, self.current_market_dfs_comp)
+        return {market_code: self._project_columns(df, self.FULL_COLUMNS) for market_code, df in market_dfs.items()}
 
     def _get_previous_week_comparison_data(self):
         """ Wrapper to get the minimal comparison data for the previous week. """
         if not self.previous_date:
              print("Error: Previous date not calculated or set. Cannot get comparison data.")
              return {}
-        return self._process_single_week_data(self.previous_date, is_comparison_data=True)
+        if self.history_db is None:
+            return self._process_single_week_data(self.previous_date, is_comparison_data=True)
+
+        market_dfs = self.load_week_history(self.previous_date)
+        if market_dfs is not None:
+            print(f"Loaded week {self.previous_date} comparison data from history store ({sum(len(df) for df in market_dfs.values())} rows).")
+            return market_dfs
+        market_dfs = self._process_single_week_data(self.previous_date, is_comparison_data=True)
+        if market_dfs:
+            self.store_week_history(self.previous_date, market_dfs)
+        return market_dfs
+
+    def _week_key(self, date_str_mm_dd):
+        """
+        ISO date of a week's 'MM.DD'. The year is the current week's (from its folder name when it
+        has one, else current_year); weeks after the current one fall in the year before.
+        """
+        year = self._week_year or self.current_year
+        week_date = datetime.strptime(f"{year}.{date_str_mm_dd}", '%Y.%m.%d')
+        if self.current_date and week_date > datetime.strptime(f"{year}.{self.current_date}", '%Y.%m.%d'):
+            week_date = week_date.replace(year=week_date.year - 1)
+        return week_date.strftime('%Y-%m-%d')
+
+    def _week_sources(self, date_str_mm_dd):
+        """ Name, size and mtime of a week's worklist files, to tell whether a stored week is stale. """
+        folder_path = self.get_week_folder(date_str_mm_dd)
+        if folder_path is None or not folder_path.exists():
+            return []
+        sources = []
+        for file_path in self.find_excel_files_in_folder(folder_path, date_str_mm_dd):
+            stat = file_path.stat()
+            sources.append([file_path.name, stat.st_size, stat.st_mtime_ns])
+        return sources
+
+    def _connect_history(self):
+        """ Open the history store, creating its tables and indexes on first use. """
+        Path(self.history_db).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.history_db)
+        value_columns = ', '.join(f'"{col}"' for col in self.COMPARISON_COLUMNS) # No declared type: values keep their own
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS weeks (
+                week TEXT PRIMARY KEY, folder_date TEXT NOT NULL, ingested_at TEXT NOT NULL,
+                row_count INTEGER NOT NULL, sources TEXT NOT NULL, markets TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS escalations (
+                week TEXT NOT NULL, market TEXT NOT NULL, row_seq INTEGER NOT NULL, {value_columns});
+            CREATE INDEX IF NOT EXISTS idx_escalations_week_market ON escalations (week, market, row_seq);
+            CREATE INDEX IF NOT EXISTS idx_escalations_member ON escalations (PayerMemberId);
+            CREATE INDEX IF NOT EXISTS idx_escalations_market ON escalations (MarketCode);
+            CREATE INDEX IF NOT EXISTS idx_escalations_practice ON escalations (PracticeName);
+        """)
+        return conn
+
+    @staticmethod
+    def _history_value(value):
+        """ SQLite-storable form of a cell: text, numbers and missing values round-trip; dates become ISO text. """
+        if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+            return None
+        if isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, np.generic):
+            return value.item()
+        return str(value)
+
+    def store_week_history(self, date_str_mm_dd, market_dfs):
+        """
+        Record a week's comparison rows in the history store, replacing any earlier copy of
+        that week in one transaction (so re-ingesting a week is idempotent).
+        """
+        week = self._week_key(date_str_mm_dd)
+        start = time.perf_counter()
+        markets, rows = {}, []
+        for market_code, df in market_dfs.items():
+            df = self._project_columns(df, self.COMPARISON_COLUMNS)
+            markets[market_code] = {'columns': list(df.columns), 'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}}
+            columns = [df[col].astype(object) if col in df.columns else [None] * len(df) for col in self.COMPARISON_COLUMNS]
+            for row_seq, values in enumerate(zip(*columns)):
+                rows.append((week, market_code, row_seq, *map(self._history_value, values)))
+        try:
+            conn = self._connect_history()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM escalations WHERE week = ?", (week,))
+                    placeholders = ', '.join('?' * (3 + len(self.COMPARISON_COLUMNS)))
+                    conn.executemany(f"INSERT INTO escalations VALUES ({placeholders})", rows)
+                    conn.execute("INSERT OR REPLACE INTO weeks VALUES (?, ?, ?, ?, ?, ?)",
+                                 (week, date_str_mm_dd, datetime.now().isoformat(timespec='seconds'), len(rows),
+                                  json.dumps(self._week_sources(date_str_mm_dd)), json.dumps(markets)))
+            finally:
+                conn.close()
+            print(f"Stored week {week} in history store: {len(rows)} rows, {len(markets)} market(s) in {time.perf_counter() - start:.2f}s")
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Could not store week {week} in history store: {str(e)}")
+
+    def load_week_history(self, date_str_mm_dd):
+        """
+        Return a week's comparison data per market from the history store, or None when the
+        week is not stored or its worklist files have changed since it was stored.
+        """
+        week = self._week_key(date_str_mm_dd)
+        start = time.perf_counter()
+        try:
+            conn = self._connect_history()
+            try:
+                entry = conn.execute("SELECT sources, markets FROM weeks WHERE week = ?", (week,)).fetchone()
+                if entry is None:
+                    return None
+                sources = self._week_sources(date_str_mm_dd)
+                if json.loads(entry[0]) != sources:
+                    print(f"Worklist files for week {week} changed since it was stored; re-reading them.")
+                    return None
+                self._week_inputs[date_str_mm_dd] = sources
+                value_columns = ', '.join(f'"{col}"' for col in self.COMPARISON_COLUMNS)
+                market_dfs = {}
+                for market_code, layout in json.loads(entry[1]).items():
+                    rows = conn.execute(f"SELECT {value_columns} FROM escalations WHERE week = ? AND market = ? ORDER BY row_seq",
+                                        (week, market_code)).fetchall()
+                    df = pd.DataFrame(rows, columns=self.COMPARISON_COLUMNS, dtype=object)[layout['columns']]
+                    for col, dtype in layout['dtypes'].items():
+                        if dtype.startswith(('int', 'uint', 'float', 'bool')):
+                            df[col] = df[col].astype(dtype)
+                        else:
+                            df[col] = df[col].where(df[col].notna(), float('nan')) # Missing cells as NaN, like read_excel
+                    market_dfs[market_code] = self._compact_dtypes(df)
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not read week {week} from history store: {str(e)}")
+            return None
+        print(f"History store query for week {week} took {time.perf_counter() - start:.3f}s")
+        return market_dfs
 
     def create_pivot_tables(self, df):
         """Create various pivot tables for analysis using standard column names"""
@@ -335,24 +1100,89 @@ class WorklistAnalyzer:
              return pivots
 
         try:
-            pivots['Practice_Escalations'] = pd.pivot_table(
-                df, index=practice_col, columns=escalation_col, values=member_id_col,
-                aggfunc='count', fill_value=0, margins=True, margins_name='Total'
-            ).sort_values('Total', ascending=False)
-
+            if isinstance(df[provider_col].dtype, pd.CategoricalDtype) and 'Unknown Provider' not in df[provider_col].cat.categories:
+                df[provider_col] = df[provider_col].cat.add_categories('Unknown Provider')
             df[provider_col] = df[provider_col].fillna('Unknown Provider')
-            pivots['Provider_Escalations'] = pd.pivot_table(
-                df, index=provider_col, columns=escalation_col, values=member_id_col,
-                aggfunc='count', fill_value=0, margins=True, margins_name='Total'
-            ).sort_values('Total', ascending=False)
-
-            summary_data = self._create_summary_data(df)
+            practice_pivot, provider_pivot, summary_data = self._aggregate_escalations(df)
+            pivots['Practice_Escalations'] = practice_pivot.sort_values('Total', ascending=False)
+            pivots['Provider_Escalations'] = provider_pivot.sort_values('Total', ascending=False)
             pivots['Summary'] = pd.DataFrame(summary_data)
 
         except Exception as e:
             print(f"Error creating pivot tables: {str(e)}")
         return pivots
 
+    def _aggregate_escalations(self, df):
+        """
+        Build the practice and provider pivots (as pd.pivot_table(aggfunc='count', fill_value=0,
+        margins=True) would) and the summary metrics from one grouped count over factorized
+        practice / provider / escalation keys. Returns (practice_pivot, provider_pivot, summary_data).
+        """
+        practice_col, provider_col, escalation_col, member_id_col = 'PracticeName', 'PCP', 'Escalation Path', 'PayerMemberId'
+        practice_codes, practices = self._factorize_sorted(df[practice_col])
+        provider_codes, providers = self._factorize_sorted(df[provider_col])
+        escalation_codes, escalations = self._factorize_sorted(df[escalation_col])
+        has_member = df[member_id_col].notna().to_numpy().astype(np.intp)
+
+        # One grouped count over (practice, provider, escalation, has member id); code 0 is a missing key
+        shape = (len(practices) + 1, len(providers) + 1, len(escalations) + 1, 2)
+        keys = np.ravel_multi_index((practice_codes + 1, provider_codes + 1, escalation_codes + 1, has_member), shape)
+        group_keys, group_counts = np.unique(keys, return_counts=True)
+        practice_keys, provider_keys, escalation_keys, member_keys = np.unravel_index(group_keys, shape)
+
+        practice_pivot = self._count_pivot(practice_keys, escalation_keys, member_keys, group_counts,
+                                           practices, escalations, practice_col, escalation_col)
+        provider_pivot = self._count_pivot(provider_keys, escalation_keys, member_keys, group_counts,
+                                           providers, escalations, provider_col, escalation_col)
+
+        escalation_totals = np.bincount(escalation_keys, weights=group_counts, minlength=shape[2])
+        def escalation_count(label):
+            return int(escalation_totals[escalations.get_loc(label) + 1]) if label in escalations else 0
+
+        summary_data = {
+                'Metric': ['Total Escalations','Market/PHO Escalations','Practice Escalations','Unique Practices','Unique Providers','Report Generated'],
+                'Value': [len(df), escalation_count('Market/PHO Escalation'), escalation_count('Practice Escalation'),
+                          len(practices), len(providers), datetime.now().strftime('%Y-%m-%d %H:%M')]
+            }
+        return practice_pivot, provider_pivot, summary_data
+
+    def _factorize_sorted(self, values):
+        """
+        pd.factorize(values, sort=True) returning plain (object) labels. Categoricals are
+        factorized from their codes, keeping only the observed categories in value order.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.remove_unused_categories()
+            if not values.cat.categories.is_monotonic_increasing:
+                values = values.cat.reorder_categories(values.cat.categories.sort_values())
+            return values.cat.codes.to_numpy().astype(np.intp), pd.Index(values.cat.categories.to_numpy(dtype=object))
+        return pd.factorize(values, sort=True)
+
+    def _count_pivot(self, row_keys, column_keys, member_keys, group_counts, row_labels, column_labels,
+                     row_name, column_name, margins_name='Total'):
+        """
+        Member-id count pivot with margins from grouped counts (key code 0 = missing). Mirrors
+        pivot_table: rows / columns need at least one row with both keys present, and the
+        margins only count rows with both keys and a member id (a row with none gets NaN).
+        """
+        n_rows, n_columns = len(row_labels) + 1, len(column_labels) + 1
+        cells = row_keys * n_columns + column_keys
+        rows_seen = np.bincount(cells, weights=group_counts, minlength=n_rows * n_columns).reshape(n_rows, n_columns)[1:, 1:]
+        members = np.bincount(cells, weights=group_counts * member_keys, minlength=n_rows * n_columns).reshape(n_rows, n_columns)[1:, 1:]
+
+        keep_rows = rows_seen.sum(axis=1) > 0
+        keep_columns = rows_seen.sum(axis=0) > 0
+        body = members[keep_rows][:, keep_columns].astype(np.int64)
+        if body.size == 0:
+            raise ValueError(f"no rows with both a {row_name} and an {column_name} to count")
+        pivot = pd.DataFrame(body, index=pd.Index(row_labels[keep_rows], name=row_name),
+                             columns=pd.Index(column_labels[keep_columns], name=column_name))
+
+        row_totals = body.sum(axis=1)
+        pivot[margins_name] = np.where(row_totals > 0, row_totals, np.nan) if (row_totals == 0).any() else row_totals
+        pivot.loc[margins_name] = list(body.sum(axis=0)) + [body.sum()]
+        return pivot
+
     def _create_summary_data(self, df):
         """Helper function to create summary data dictionary using standard names."""
         practice_col = 'PracticeName'
@@ -377,39 +1207,19 @@ class WorklistAnalyzer:
              return None
 
         try:
-            plt.style.use('seaborn-v0_8-whitegrid')
             viz_df = pivot_df.drop('Total', axis=0)
             if 'Total' in viz_df.columns: viz_df = viz_df.drop('Total', axis=1)
             if viz_df.empty: return None
 
-            num_practices = len(viz_df)
-            fig_height = max(6, num_practices * 0.35)
-            fig, ax = plt.subplots(figsize=(10, fig_height))
-            viz_df.plot(kind='barh', stacked=True, ax=ax, colormap='viridis')
-
-            ax.set_title(f'{market_code} Escalations by Practice', pad=15, fontsize=12, weight='bold')
-            ax.set_xlabel('# of Escalations', fontsize=10); ax.set_ylabel('')
-            ax.tick_params(axis='y', labelsize=8); ax.tick_params(axis='x', labelsize=9)
-
-            for container in ax.containers:
-                labels = [f'{int(v)}' if v > 0 else '' for v in container.datavalues]
-                ax.bar_label(container, labels=labels, label_type='center', fontsize=7, color='white', weight='bold')
-
-            ax.invert_yaxis()
-            ax.legend(title='Escalation Type', bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=9, title_fontsize=10)
-            plt.tight_layout(rect=[0, 0, 0.9, 1])
-
             # Construct PNG filename based on XLSX filename stem
             png_filename = output_filepath_xlsx.stem + "_Practice_Chart.png"
             plot_filepath = output_filepath_xlsx.parent / png_filename
-            plt.savefig(plot_filepath, dpi=300, bbox_inches='tight')
-            plt.close(fig)
-            print(f"Created visualization: {plot_filepath.name}")
+            render_seconds = _get_chart_renderer(self.chart_preset).render(viz_df, market_code, plot_filepath)
+            print(f"Created visualization: {plot_filepath.name} (rendered in {render_seconds:.2f}s, preset '{self.chart_preset}')")
             return plot_filepath
 
         except Exception as e:
             print(f"Error creating visualization for {market_code}: {str(e)}")
-            plt.close() # Ensure plot closed on error
             return None
 
     def _insert_image_to_excel(self, xlsx_path, img_path, sheet_name='Practice Chart', cell='B2'):
@@ -421,6 +1231,7 @@ class WorklistAnalyzer:
              print(f"Cannot insert image: excel file not found at {xlsx_path}")
              return
         try:
+            from openpyxl.drawing.image import Image as ExcelImage # Pulls in Pillow, so only imported here
             workbook = load_workbook(xlsx_path)
             if sheet_name not in workbook.sheetnames:
                  workbook.create_sheet(sheet_name)
@@ -439,19 +1250,29 @@ class WorklistAnalyzer:
              print(f"Error inserting image {img_path.name} into sheet '{sheet_name}': {str(e)}")
 
 
-    def create_market_files(self, current_market_dfs):
+    def create_market_files(self, current_market_dfs, markets=None):
         """
         Create separate Excel files for each market including raw data, pivots,
         and the new Week-over-Week comparison sheets.
         Uses output filename format: MM.DD [MarketName] Med Adherence Escalations.xlsx
+        markets restricts the reports to those market codes (default: self.markets, None = all).
+        Markets whose inputs and report config match the week's output manifest, and whose
+        output files are untouched since, are not rebuilt (status 'unchanged') unless force_rebuild is set.
+        With columnar_outputs each report's frames are also written as Parquet (see _write_columnar_outputs).
         """
         if not current_market_dfs:
             print("No current week data available to create files.")
             return
 
         print("\n--- Preparing Week-over-Week Comparison Data ---")
-        previous_market_dfs_comp = self._get_previous_week_comparison_data()
-        current_market_dfs_comp = self._process_single_week_data(self.current_date, is_comparison_data=True)
+        with self.recorder.record('stage', 'comparison_data', week=self.previous_date) as entry:
+            previous_market_dfs_comp = self._get_previous_week_comparison_data()
+            if self.current_market_dfs_comp is not None and self._comparison_view_date == self.current_date:
+                print("Using current week comparison data projected from the already loaded worklists.")
+                current_market_dfs_comp = self.current_market_dfs_comp
+            else:
+                current_market_dfs_comp = self._process_single_week_data(self.current_date, is_comparison_data=True)
+            entry.update(rows_out=sum(len(df) for df in previous_market_dfs_comp.values()))
 
         if not previous_market_dfs_comp: print("Warning: No previous week data found for comparison.")
         if not current_market_dfs_comp: print("Warning: Could not process current week data for comparison.")
@@ -459,178 +1280,1050 @@ class WorklistAnalyzer:
         file_date_prefix = self.current_date # Use MM.DD format
         print(f"\n--- Generating Market Reports for Week {file_date_prefix} ---")
 
-        all_market_codes = set(current_market_dfs.keys()) | set(previous_market_dfs_comp.keys())
-
-        for market_code in all_market_codes:
-            print(f"\nProcessing market: {market_code}")
+        all_market_codes = sorted(set(current_market_dfs.keys()) | set(previous_market_dfs_comp.keys()), key=str)
+        markets = markets if markets is not None else self.markets
+        if markets is not None:
+            requested = [str(market_code).strip() for market_code in markets]
+            unknown = [market_code for market_code in requested if market_code not in map(str, all_market_codes)]
+            if unknown: print(f"Warning: No data for requested market(s): {unknown}")
+            all_market_codes = [market_code for market_code in all_market_codes if str(market_code) in requested]
+            print(f"Building reports for {len(all_market_codes)} selected market(s): {all_market_codes}")
+        with self.recorder.record('stage', 'member_diff', markets=len(all_market_codes)) as entry:
+            member_diffs = self.diff_member_weeks([previous_market_dfs_comp, current_market_dfs_comp])[0] # All markets at once
+            entry.update(rows_in=sum(len(df) for df in previous_market_dfs_comp.values()) + sum(len(df) for df in current_market_dfs_comp.values()))
+        market_jobs = [(market_code,
+                        current_market_dfs.get(market_code, pd.DataFrame()),
+                        current_market_dfs_comp.get(market_code, pd.DataFrame()),
+                        previous_market_dfs_comp.get(market_code, pd.DataFrame()),
+                        member_diffs.get(market_code))
+                       for market_code in all_market_codes]
+
+        # Skip markets whose report inputs and outputs match the output manifest from an earlier run
+        manifest = self._load_output_manifest()
+        digests = {job[0]: self._market_input_digest(*job[:4]) for job in market_jobs}
+        unchanged = [job[0] for job in market_jobs
+                     if not self.force_rebuild and self._market_up_to_date(manifest, job[0], digests[job[0]])]
+        if unchanged:
+            print(f"Skipping {len(unchanged)} market(s) unchanged since their reports were built: {unchanged}")
+        pending_jobs = [job for job in market_jobs if job[0] not in unchanged]
+
+        start = time.perf_counter()
+        workers = min(self.report_workers or 1, len(pending_jobs))
+        results = []
+        with self.recorder.record('stage', 'reports', markets=len(pending_jobs), workers=workers, unchanged=len(unchanged),
+                                  rows_in=sum(len(job[1]) for job in pending_jobs)) as entry:
+            if workers <= 1:
+                for job in pending_jobs:
+                    print(f"\nProcessing market: {job[0]}")
+                    results.append(self._create_single_market_file(*job))
+            else:
+                # Markets are independent: build them in worker processes (Agg backend, one pyplot state each)
+                print(f"Building {len(pending_jobs)} market reports in {workers} worker processes...")
+                settings = self._worker_settings()
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_create_market_file_in_worker, settings, *job) for job in pending_jobs]
+                    for job, future in zip(pending_jobs, futures):
+                        print(f"\nProcessing market: {job[0]}")
+                        try:
+                            result, worker_log, records = future.result()
+                            self.recorder.records.extend(records)
+                        except Exception as e: # Worker process died
+                            result = {'market': job[0], 'status': 'failed', 'file': None, 'error': str(e), 'seconds': 0.0}
+                            worker_log = f"\nError creating file for market {job[0]}: {str(e)}\n"
+                        print(worker_log, end='')
+                        results.append(result)
+            entry['created'] = sum(1 for result in results if result['status'] == 'created')
+
+        built = {result['market']: result for result in results}
+        results = [built.get(job[0]) or {'market': job[0], 'status': 'unchanged', 'file': self._market_report_path(job[0]).name,
+                                         'error': None, 'seconds': 0.0}
+                   for job in market_jobs]
+        self._save_output_manifest(manifest, results, digests, {job[0]: len(job[1]) for job in market_jobs})
+        self._print_report_summary(results, time.perf_counter() - start)
+        return results
+
+    def _market_report_path(self, market_code):
+        """ Output path of a market's report: 'MM.DD [MarketName] Med Adherence Escalations.xlsx'. """
+        return self.output_folder / f"{self.current_date} {market_code} Med Adherence Escalations.xlsx"
+
+    def _market_columnar_dir(self, market_code):
+        """ Folder of a market's columnar outputs, named after its report. """
+        return self.output_folder / f"{self._market_report_path(market_code).stem} Columnar"
+
+    def _write_columnar_outputs(self, market_code, frames, metrics):
+        """
+        Write a market's report frames (as written to its workbook) to its columnar folder, one
+        '<name>.parquet' each, plus 'summary.json' with the WoW metrics and each file's row count.
+        Object columns mixing text and numbers (e.g. PayerMemberId) are stored as text, since
+        Parquet columns have one type. Files left from an earlier build are removed first.
+        """
+        columnar_dir = self._market_columnar_dir(market_code)
+        columnar_dir.mkdir(parents=True, exist_ok=True)
+        for old_path in list(columnar_dir.glob('*.parquet')) + [columnar_dir / 'summary.json']:
+            if old_path.exists(): old_path.unlink()
+        files = {}
+        for name, df in frames.items():
+            df = df.copy(deep=False)
+            df.columns = [str(col) for col in df.columns]
+            for col in df.columns[df.dtypes == object]:
+                if pd.api.types.infer_dtype(df[col], skipna=True) not in ('string', 'empty'):
+                    df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value))
+            df.to_parquet(columnar_dir / f"{name}.parquet", index=False)
+            files[f"{name}.parquet"] = len(df)
+        summary = {'market': str(market_code), 'week': self.current_date, 'previous_week': self.previous_date,
+                   'generated_at': metrics.pop('Report Generated', None),
+                   'metrics': {key: int(value) for key, value in metrics.items()}, 'files': files}
+        (columnar_dir / 'summary.json').write_text(json.dumps(summary, separators=(',', ':')))
+        print(f"- Wrote {len(files)} Parquet file(s) and summary.json to '{columnar_dir.name}'.")
+        return columnar_dir
+
+    def _market_outputs(self, market_code):
+        """ Size and mtime of a market's report, practice chart and columnar outputs, for the ones that exist. """
+        report_path = self._market_report_path(market_code)
+        columnar_dir = self._market_columnar_dir(market_code)
+        columnar_paths = sorted(columnar_dir.iterdir()) if columnar_dir.is_dir() else []
+        outputs = {}
+        for path in [report_path, report_path.parent / (report_path.stem + "_Practice_Chart.png")] + columnar_paths:
+            if path.exists():
+                stat = path.stat()
+                outputs[str(path.relative_to(self.output_folder))] = [stat.st_size, stat.st_mtime_ns]
+        return outputs
+
+    def _report_config(self):
+        """ Settings that change what a market report looks like. """
+        return {'report_version': self.REPORT_VERSION, 'writer_engine': self.writer_engine, 'date_mode': self.date_mode,
+                'chart_preset': self.chart_preset, 'width_sample_rows': self.width_sample_rows,
+                'columnar_outputs': self.columnar_outputs}
+
+    def _market_input_digest(self, market_code, current_df_full, current_df_comp, previous_df_comp):
+        """
+        Hash of everything a market's report is built from: its full and WoW frames (values,
+        columns and dtypes) and the report config. The member diff is derived from the WoW
+        frames, so it is covered by them.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps([str(market_code), self._report_config()], sort_keys=True).encode('utf-8'))
+        for df in (current_df_full, current_df_comp, previous_df_comp):
+            digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _manifest_path(self):
+        return self.output_folder / f"{self.current_date} Output Manifest.json"
+
+    def _load_output_manifest(self):
+        """ The week's output manifest, or an empty one when there is none (or it cannot be read). """
+        manifest_path = self._manifest_path()
+        if not manifest_path.exists():
+            return {}
+        try:
+            return json.loads(manifest_path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read output manifest {manifest_path.name}, rebuilding every market: {str(e)}")
+            return {}
 
-            current_df_full = current_market_dfs.get(market_code, pd.DataFrame())
-            current_df_comp = current_market_dfs_comp.get(market_code, pd.DataFrame())
-            previous_df_comp = previous_market_dfs_comp.get(market_code, pd.DataFrame())
+    def _market_up_to_date(self, manifest, market_code, input_digest):
+        """ Whether a market's manifest entry has the same input digest and its outputs are untouched since. """
+        entry = manifest.get('markets', {}).get(str(market_code))
+        if not entry or entry.get('input_digest') != input_digest:
+            return False
+        outputs = self._market_outputs(market_code)
+        return self._market_report_path(market_code).name in outputs and entry.get('outputs') == outputs
 
-            if current_df_full.empty and current_df_comp.empty:
-                 print(f"No current week data found for market {market_code}. Skipping file creation.")
-                 continue
+    def _save_output_manifest(self, manifest, results, digests, market_rows):
+        """
+        Write '<MM.DD> Output Manifest.json' in the output folder: the week's worklist files, the
+        report config and, per built market, its input digest, row count and output files (size,
+        mtime). Markets that failed or were skipped lose their entry so the next run retries them.
+        """
+        markets = manifest.get('markets', {})
+        for result in results:
+            market_key = str(result['market'])
+            if result['status'] == 'created':
+                markets[market_key] = {'input_digest': digests[result['market']], 'rows': market_rows[result['market']],
+                                       'outputs': self._market_outputs(result['market']),
+                                       'built_at': datetime.now().isoformat(timespec='seconds')}
+            elif result['status'] != 'unchanged':
+                markets.pop(market_key, None)
+        manifest = {
+            'week': self.current_date,
+            'previous_week': self.previous_date,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'inputs': {'current': self._week_inputs.get(self.current_date),
+                       'previous': self._week_inputs.get(self.previous_date)},
+            'config': self._report_config(),
+            'markets': markets,
+        }
+        manifest_path = self._manifest_path()
+        try:
+            manifest_path.write_text(json.dumps(manifest, indent=2, default=str))
+        except Exception as e:
+            print(f"Warning: Could not write output manifest {manifest_path.name}: {str(e)}")
 
-            # Output Filename Format
-            filename = f"{file_date_prefix} {market_code} Med Adherence Escalations.xlsx"
-            file_path = self.output_folder / filename
-            print(f"Output file will be: {filename}")
+    def run_week(self, date_str, markets=None):
+        """
+        Build the reports for one week ('MM.DD'), optionally only for the given market codes.
+        Parsed weeks, resolved headers and the file cache stay on this analyzer, so later
+        calls (another market subset, or the next week, whose previous week is this one)
+        reuse them. Returns the per-market results of create_market_files.
+        """
+        start = time.perf_counter()
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        self.recorder = RunRecorder(self.trace_memory)
+        self.refresh_discovery() # List the folders afresh once per run
+        stats_before = {'worklist_cache': dict(self.cache_stats), 'header_resolver': dict(self.header_resolver.stats),
+                        'discovery': dict(self.discovery_stats)}
+        results = []
+        try:
+            with self.recorder.record('run', date_str) as entry:
+                self.set_date(date_str) # Sets current and previous dates
+
+                # Process current week for main analysis dataframes
+                current_market_data = self.process_worklists()
+                entry['rows_in'] = sum(len(df) for df in current_market_data.values())
+                if not current_market_data:
+                    print(f"\n--- No data found for week {date_str}. No reports generated. ---")
+                else:
+                    # Create the market files (which includes WoW comparison using helper methods)
+                    results = self.create_market_files(current_market_data, markets)
+                    print(f"\n--- Week {date_str} complete in {time.perf_counter() - start:.2f}s ---")
+        finally:
+            self.recorder.close()
+        if self.run_report:
+            self.save_run_report(results, stats_before)
+        return results
+
+    def save_run_report(self, results, stats_before=None):
+        """
+        Write the current run's RunRecorder records as '<MM.DD> Run Report.json' in the output
+        folder: run settings, then one list each of stages, files, sheets, directory listings,
+        markets and market steps (with wall / CPU time, rows and memory), plus cache and
+        discovery counters and report results.
+        stats_before holds the cache counters at the start of the run, so only this run's are reported.
+        """
+        stats_before = stats_before or {}
+        counters = {}
+        for name, stats in [('worklist_cache', self.cache_stats), ('header_resolver', self.header_resolver.stats),
+                            ('discovery', self.discovery_stats)]:
+            before = stats_before.get(name, {})
+            counters[name] = {key: round(count - before.get(key, 0), 4) for key, count in stats.items()}
+        runs = self.recorder.of_kind('run')
+        report = {
+            'week': self.current_date,
+            'previous_week': self.previous_date,
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'settings': {**self._worker_settings(), 'base_path': self.base_path, 'max_workers': self.max_workers,
+                         'report_workers': self.report_workers, 'cache_folder': self.cache_folder,
+                         'history_db': self.history_db, 'markets': self.markets},
+            'versions': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__},
+            'run': runs[-1] if runs else None,
+            'stages': self.recorder.of_kind('stage'),
+            'files': self.recorder.of_kind('file'),
+            'sheets': self.recorder.of_kind('sheet'),
+            'listings': self.recorder.of_kind('listing'),
+            'markets': self.recorder.of_kind('market'),
+            'market_steps': self.recorder.of_kind('step'),
+            **counters,
+            'reports': results,
+        }
+        report_path = self.output_folder / f"{self.current_date} Run Report.json"
+        try:
+            report_path.write_text(json.dumps(report, indent=2, default=str))
+            print(f"Run report written: {report_path}")
+        except Exception as e:
+            print(f"Warning: Could not write run report {report_path.name}: {str(e)}")
+        return report_path
 
-            img_filepath_to_insert = None # Reset for each market
+    def run_weeks(self, date_strs, markets=None):
+        """ Run run_week for each 'MM.DD' in order with this analyzer's warm caches. Returns {date: results}. """
+        return {date_str: self.run_week(date_str, markets) for date_str in date_strs}
 
+    def watch_week(self, date_str, interval=30, debounce=10, max_updates=None):
+        """
+        Watch a week's folder ('MM.DD') and rebuild its reports as worklists land. The folder is
+        polled every interval seconds; once a new, changed or removed worklist has kept the same
+        size and mtime for debounce seconds (and Excel no longer has it open), run_week runs
+        again. Only the changed files are parsed (keep_file_frames) and only the markets whose
+        data changed are rebuilt (output manifest). The first update builds the week as it is.
+        Logs each file's latency from landing (its mtime) to its markets' updated reports.
+        Stops after max_updates updates (None = until interrupted); returns the number of updates.
+        """
+        self.keep_file_frames = True
+        force_rebuild = self.force_rebuild
+        self.set_date(date_str)
+        print(f"\n--- Watching week {date_str} in {self.base_path} (poll every {interval}s, debounce {debounce}s) ---")
+        processed = None # Worklist name -> (size, mtime_ns) as of the last update
+        pending = {} # Worklist name -> (source, monotonic time it last changed, epoch time it was detected)
+        updates = 0
+        try:
+            while max_updates is None or updates < max_updates:
+                sources, locked = self._poll_week_files(date_str)
+                now = time.monotonic()
+                if processed is None:
+                    pending = {name: (source, now - debounce, time.time()) for name, source in sources.items()}
+                else:
+                    changed = {name for name in set(sources) | set(processed) if sources.get(name) != processed.get(name)}
+                    pending = {name: pending[name] if name in pending and pending[name][0] == sources.get(name)
+                               else (sources.get(name), now, time.time())
+                               for name in changed}
+                settling = [name for name, (_, changed_at, _) in pending.items() if now - changed_at < debounce or name in locked]
+                if (pending or processed is None) and not settling:
+                    self._run_watch_update(date_str, pending, processed is None)
+                    self.force_rebuild = False # --force only applies to the first build
+                    processed = sources
+                    pending = {}
+                    updates += 1
+                    if max_updates is not None and updates >= max_updates:
+                        break
+                    print(f"\nWatching week {date_str} for changes...")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print(f"\n--- Stopped watching week {date_str} ---")
+        finally:
+            self.force_rebuild = force_rebuild
+        return updates
+
+    def _poll_week_files(self, date_str):
+        """
+        Size and mtime of a week's worklists by name, plus the names Excel has open (a '~$'
+        lock file next to them). Lock files themselves are never worklists. Discovery logs are dropped.
+        """
+        self.recorder = RunRecorder() # Polls are not part of any run report
+        self.refresh_discovery()
+        with contextlib.redirect_stdout(io.StringIO()):
+            folder_path = self.get_week_folder(date_str)
+            if folder_path is None or not folder_path.exists():
+                return {}, set()
+            excel_files = self.find_excel_files_in_folder(folder_path, date_str)
+            lock_names = [name[2:] for name, is_dir in self._list_folder(folder_path) if name.startswith('~$')]
+        sources, locked = {}, set()
+        for file_path in excel_files:
             try:
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    # --- 1. Write Main Analysis Tabs ---
-                    if not current_df_full.empty:
-                        data_sheet_name = f"{market_code} Data"
-                        print(f"- Writing '{data_sheet_name}' sheet ({len(current_df_full)} records)...")
-                        current_df_full.to_excel(writer, sheet_name=data_sheet_name, index=False)
+                stat = file_path.stat()
+            except FileNotFoundError: # Removed between listing and stat
+                continue
+            sources[file_path.name] = (stat.st_size, stat.st_mtime_ns)
+            # Excel names the lock '~$' + the file name, or replaces the first two characters of long names
+            if file_path.name in lock_names or file_path.name[2:] in lock_names:
+                locked.add(file_path.name)
+        return sources, locked
+
+    def _file_markets(self, file_path):
+        """ Market codes in a worklist's kept frame (empty when it is not kept). """
+        kept = self._file_frames.get((file_path, False))
+        if kept is None or kept[1] is None or 'MarketCode' not in kept[1].columns:
+            return set()
+        return set(kept[1]['MarketCode'].dropna().astype(str).str.strip())
+
+    def _run_watch_update(self, date_str, pending, initial):
+        """ Rebuild the week after pending changes settled, then log each changed file's end-to-end latency. """
+        folder_path = self.get_week_folder(date_str)
+        file_paths = {name: folder_path / name for name in pending} if folder_path is not None else {}
+        markets_before = {name: self._file_markets(file_path) for name, file_path in file_paths.items()}
+        if initial:
+            print(f"\n--- Building week {date_str} from {len(pending)} worklist(s) ---")
+        else:
+            print(f"\n--- {len(pending)} worklist(s) changed: {sorted(pending)} ---")
+        start = time.perf_counter()
+        results = self.run_week(date_str)
+        finished_at = time.time()
+        rebuilt = {str(result['market']) for result in results if result['status'] == 'created'}
+        print(f"\n--- Watch update for week {date_str}: {len(rebuilt)} market report(s) rebuilt in {time.perf_counter() - start:.2f}s ---")
+        if initial:
+            return
+        for name, (source, _, detected_at) in sorted(pending.items()):
+            markets = sorted(markets_before.get(name, set()) | self._file_markets(file_paths.get(name)))
+            landed_at = source[1] / 1e9 if source is not None else detected_at
+            state = 'removed' if source is None else 'updated'
+            print(f"  {name} ({state}): markets {markets}, rebuilt {sorted(rebuilt & set(markets))}; "
+                  f"{finished_at - landed_at:.1f}s from landing to report ({detected_at - landed_at:.1f}s to detect)")
+
+    def diff_member_weeks(self, weekly_market_dfs, id_col='PayerMemberId'):
+        """
+        Member-level diff between consecutive weeks for every market in one pass.
+        weekly_market_dfs is a list of {market: frame} dicts, oldest week first. Member ids of all
+        weeks and markets are factorized into one integer code space, and each pair of weeks is
+        compared with sorted NumPy set operations on (market, member code) keys.
+        Returns one {market: diff} dict per consecutive pair, where diff holds 'new' and
+        'persisting' (row positions in the later week's frame), 'dropped' (row positions in the
+        earlier one) - the first row of each member, in row order - plus the distinct member
+        counts 'current_ids' and 'previous_ids'. Missing ids never match anything.
+        """
+        markets = sorted({market for market_dfs in weekly_market_dfs for market in market_dfs}, key=str)
+        segments = [] # (week, market index, ids) for every frame that has the id column
+        for week, market_dfs in enumerate(weekly_market_dfs):
+            for market_idx, market in enumerate(markets):
+                df = market_dfs.get(market)
+                if df is not None and id_col in df.columns and len(df):
+                    segments.append((week, market_idx, df[id_col]))
+        if segments:
+            codes = pd.factorize(pd.concat([ids for _, _, ids in segments], ignore_index=True))[0]
+        else:
+            codes = np.empty(0, dtype=np.intp)
+        n_codes = int(codes.max()) + 1 if len(codes) else 1
+
+        # Per week: the sorted distinct (market, member) keys with the market and row of each key's first row
+        week_parts = [[] for _ in weekly_market_dfs]
+        offset = 0
+        for week, market_idx, ids in segments:
+            segment_codes = codes[offset:offset + len(ids)]
+            offset += len(ids)
+            rows = np.flatnonzero(segment_codes >= 0)
+            week_parts[week].append((market_idx * n_codes + segment_codes[rows].astype(np.int64), rows))
+        week_keys = []
+        for parts in week_parts:
+            keys = np.concatenate([part[0] for part in parts]) if parts else np.empty(0, dtype=np.int64)
+            rows = np.concatenate([part[1] for part in parts]) if parts else np.empty(0, dtype=np.intp)
+            unique_keys, first = np.unique(keys, return_index=True)
+            week_keys.append((unique_keys, rows[first]))
+
+        def market_bounds(keys):
+            """ Where each market's slice starts in sorted keys (plus the end). """
+            return np.searchsorted(keys, np.arange(len(markets) + 1, dtype=np.int64) * n_codes)
+
+        def split_by_market(keys, rows):
+            """ Row positions per market index, in row order. """
+            bounds = market_bounds(keys)
+            return [np.sort(rows[bounds[i]:bounds[i + 1]]) for i in range(len(markets))]
+
+        diffs = []
+        for week in range(1, len(weekly_market_dfs)):
+            previous_keys, previous_rows = week_keys[week - 1]
+            current_keys, current_rows = week_keys[week]
+            in_previous = np.isin(current_keys, previous_keys, assume_unique=True)
+            in_current = np.isin(previous_keys, current_keys, assume_unique=True)
+            new = split_by_market(current_keys[~in_previous], current_rows[~in_previous])
+            persisting = split_by_market(current_keys[in_previous], current_rows[in_previous])
+            dropped = split_by_market(previous_keys[~in_current], previous_rows[~in_current])
+            current_counts = np.diff(market_bounds(current_keys))
+            previous_counts = np.diff(market_bounds(previous_keys))
+            diffs.append({market: {'new': new[i], 'dropped': dropped[i], 'persisting': persisting[i],
+                                   'current_ids': int(current_counts[i]), 'previous_ids': int(previous_counts[i])}
+                          for i, market in enumerate(markets)})
+        return diffs
+
+    def _print_report_summary(self, results, elapsed):
+        """ Print per-market wall time and the overall created/failed/skipped counts. """
+        print(f"\n--- Market Report Summary ({elapsed:.2f}s total) ---")
+        for result in results:
+            line = f"  {str(result['market']):<20} {result['status']:<8} {result['seconds']:6.2f}s"
+            if result['error']: line += f"  ({result['error']})"
+            print(line)
+        counts = {status: sum(1 for r in results if r['status'] == status) for status in ('created', 'failed', 'skipped', 'unchanged')}
+        print(f"Created: {counts['created']}, Failed: {counts['failed']}, Skipped: {counts['skipped']}, Unchanged: {counts['unchanged']}")
+        print(f"Markets rebuilt: {len(results) - counts['unchanged']}, skipped as unchanged: {counts['unchanged']}")
+
+    def fit_column_widths(self, df, max_width=None, index=False, scale=1.1):
+        """ fit_column_widths (worklist_sheets) with this analyzer's width_sample_rows and date_mode. """
+        return fit_column_widths(df, max_width, index, scale, sample_rows=self.width_sample_rows,
+                                 date_format=self.EXCEL_DATE_FORMAT if self.date_mode == 'excel' else None)
+
+    def _open_report_writer(self, file_path):
+        """ Open the report writer backend selected by self.writer_engine (see REPORT_WRITERS). """
+        writer_class = REPORT_WRITERS.get(self.writer_engine)
+        if writer_class is None:
+            raise ValueError(f"Unknown writer_engine '{self.writer_engine}'. Use one of: {list(REPORT_WRITERS)}")
+        date_format = self.EXCEL_DATE_FORMAT if self.date_mode == 'excel' else None
+        try:
+            return writer_class(file_path, date_format=date_format)
+        except ImportError:
+            print(f"Warning: {self.writer_engine} not installed? Falling back to openpyxl. `pip install {self.writer_engine}`")
+            return OpenpyxlReportWriter(file_path, date_format=date_format)
+
+    def _create_single_market_file(self, market_code, current_df_full, current_df_comp, previous_df_comp, member_diff=None):
+        """
+        Build one market's report (data, pivots, chart, WoW sheets). member_diff is this market's
+        entry from diff_member_weeks (computed here when not given). Returns a result dict with
+        the market, status ('created', 'failed' or 'skipped'), output file name, error and wall time.
+        """
+        with self.recorder.record('market', market_code, rows_in=len(current_df_full)) as entry:
+            result = self._build_market_file(market_code, current_df_full, current_df_comp, previous_df_comp, member_diff)
+            entry.update(status=result['status'], file=result['file'], error=result['error'])
+        return result
+
+    def _build_market_file(self, market_code, current_df_full, current_df_comp, previous_df_comp, member_diff):
+        """ The body of _create_single_market_file; each step is recorded against the market. """
+        start = time.perf_counter()
+        result = {'market': market_code, 'status': 'skipped', 'file': None, 'error': None, 'seconds': 0.0}
+        file_date_prefix = self.current_date # Use MM.DD format
+
+        if current_df_full.empty and current_df_comp.empty:
+             print(f"No current week data found for market {market_code}. Skipping file creation.")
+             return result
+
+        # Output Filename Format
+        file_path = self._market_report_path(market_code)
+        filename = file_path.name
+        print(f"Output file will be: {filename}")
+        result['file'] = filename
+
+        img_filepath_to_insert = None # Reset for each market
+        columnar_frames = {} # Parquet name -> frame written to the workbook, for columnar_outputs
+
+        try:
+            with self._open_report_writer(file_path) as writer:
+                # --- 1. Write Main Analysis Tabs ---
+                if not current_df_full.empty:
+                    data_sheet_name = f"{market_code} Data"
+                    print(f"- Writing '{data_sheet_name}' sheet ({len(current_df_full)} records)...")
+                    with self.recorder.record('step', 'data_sheet', market=market_code, rows_out=len(current_df_full)):
+                        writer.write_frame(current_df_full, data_sheet_name, index=False)
+                        columnar_frames['data'] = current_df_full.copy(deep=False) # create_pivot_tables fills in PCP
                         # Autofit columns for data sheet
-                        worksheet = writer.sheets[data_sheet_name]
-                        for idx, column in enumerate(current_df_full.columns):
-                             col_letter = get_column_letter(idx + 1)
-                             try: max_len = max(current_df_full[column].astype(str).map(len).max(), len(str(column)))
-                             except: max_len = len(str(column)) # Fallback
-                             adjusted_width = min((max_len + 2) * 1.1, 60)
-                             worksheet.column_dimensions[col_letter].width = adjusted_width
-
-                        print("- Creating and writing Pivot Table sheets...")
+                        writer.set_column_widths(data_sheet_name, self.fit_column_widths(current_df_full, max_width=60))
+
+                    print("- Creating and writing Pivot Table sheets...")
+                    with self.recorder.record('step', 'pivot_tables', market=market_code, rows_in=len(current_df_full)) as entry:
                         pivot_tables = self.create_pivot_tables(current_df_full)
-                        for pivot_name, pivot_df in pivot_tables.items():
-                             if not pivot_df.empty:
-                                 sheet_name = pivot_name[:31]
-                                 pivot_df.to_excel(writer, sheet_name=sheet_name)
-                                 print(f"  - Created '{sheet_name}' sheet.")
-                                 # Autofit columns for pivot sheets
-                                 pivot_worksheet = writer.sheets[sheet_name]
-                                 for col_idx, col_val in enumerate(pivot_df.reset_index().columns):
-                                     col_letter = get_column_letter(col_idx + 1)
-                                     try: max_len = max(pivot_df.reset_index()[col_val].astype(str).map(len).max(), len(str(col_val)))
-                                     except: max_len = len(str(col_val))
-                                     adjusted_width = min((max_len + 2) * 1.1, 50)
-                                     pivot_worksheet.column_dimensions[col_letter].width = adjusted_width
-                             else: print(f"  - Pivot table '{pivot_name}' was empty.")
-
-                         # Create visualization PNG (don't insert yet)
-                        practice_pivot = pivot_tables.get('Practice_Escalations')
-                        if practice_pivot is not None and not practice_pivot.empty:
-                              print("- Creating Practice Escalation visualization PNG...")
+                        entry['rows_out'] = sum(len(pivot_df) for pivot_df in pivot_tables.values())
+                    for pivot_name, pivot_df in pivot_tables.items():
+                         if not pivot_df.empty:
+                             sheet_name = pivot_name[:31]
+                             writer.write_frame(pivot_df, sheet_name, index=True)
+                             columnar_frames[f"pivot_{pivot_name}"] = pivot_df.reset_index()
+                             print(f"  - Created '{sheet_name}' sheet.")
+                             # Autofit columns for pivot sheets
+                             writer.set_column_widths(sheet_name, self.fit_column_widths(pivot_df, max_width=50, index=True))
+                         else: print(f"  - Pivot table '{pivot_name}' was empty.")
+
+                     # Create visualization PNG (don't insert yet)
+                    practice_pivot = pivot_tables.get('Practice_Escalations')
+                    if practice_pivot is not None and not practice_pivot.empty:
+                          print("- Creating Practice Escalation visualization PNG...")
+                          with self.recorder.record('step', 'chart', market=market_code, rows_in=len(practice_pivot)):
                               img_filepath_to_insert = self.create_practice_visualization(practice_pivot, market_code, file_path)
-                              if not img_filepath_to_insert: print("  - Visualization PNG creation failed.")
-                        else: print("- Skipping Practice Escalation visualization (no data).")
-                    else: print("- No current week data to write main analysis tabs.")
-
-                    # --- 2. Perform WoW Comparison and Write Tabs ---
-                    print("- Performing Week-over-Week comparison...")
-                    new_members = pd.DataFrame()
-                    resolved = pd.DataFrame()
-                    wow_summary_dict = {'Metric': ['Current Week Escalations', 'Previous Week Escalations', 'New Escalations This Week', 'Removed Since Last Week', 'Net Change', 'Report Generated'], 'Value': [0, 0, 0, 0, 0, datetime.now().strftime('%Y-%m-%d %H:%M')]}
-                    id_col = 'PayerMemberId' # Standardized name
-                    current_ids = set()
-                    prev_ids = set()
-
-                    if id_col in current_df_comp.columns: current_ids = set(current_df_comp[id_col].dropna().unique())
-                    else: print(f"  Warning: Comparison ID '{id_col}' not in current data for {market_code}.")
-                    if id_col in previous_df_comp.columns: prev_ids = set(previous_df_comp[id_col].dropna().unique())
-                    else: print(f"  Warning: Comparison ID '{id_col}' not in previous data for {market_code}.")
-
-                    if current_ids or prev_ids: # Only compare if we have some IDs
-                         new_ids = current_ids - prev_ids
-                         resolved_ids = prev_ids - current_ids
-
-                         if new_ids and id_col in current_df_comp.columns:
-                              new_members = current_df_comp[current_df_comp[id_col].isin(new_ids)].drop_duplicates(subset=[id_col]).reset_index(drop=True)
-                              print(f"  - Identified {len(new_members)} new escalations.")
-                         else: print("  - No new escalations identified.")
-
-                         if resolved_ids and id_col in previous_df_comp.columns:
-                              resolved = previous_df_comp[previous_df_comp[id_col].isin(resolved_ids)].drop_duplicates(subset=[id_col]).reset_index(drop=True)
-                              print(f"  - Identified {len(resolved)} removed escalations.")
-                         else: print("  - No escalations removed since last week.")
-                    else:
-                         print("  - Skipping WoW comparison logic due to missing ID columns in data.")
-
-
-                    wow_summary_dict['Value'][0] = len(current_ids)
-                    wow_summary_dict['Value'][1] = len(prev_ids)
-                    wow_summary_dict['Value'][2] = len(new_members)
-                    wow_summary_dict['Value'][3] = len(resolved)
-                    wow_summary_dict['Value'][4] = wow_summary_dict['Value'][0] - wow_summary_dict['Value'][1]
-                    wow_summary_df = pd.DataFrame(wow_summary_dict)
-
-                    print("- Writing Week-over-Week comparison sheets...")
-                    wow_summary_df.to_excel(writer, sheet_name='WoW Summary', index=False)
-                    # Provide default columns if dataframes are empty for WoW sheets
-                    new_cols = new_members.columns if not new_members.empty else (current_df_comp.columns if not current_df_comp.empty else ['PayerMemberId','PatientName','MarketCode','PracticeName'])
-                    res_cols = resolved.columns if not resolved.empty else (previous_df_comp.columns if not previous_df_comp.empty else new_cols)
-
-                    pd.DataFrame(new_members, columns=new_cols).to_excel(writer, sheet_name='New This Week', index=False)
-                    pd.DataFrame(resolved, columns=res_cols).to_excel(writer, sheet_name='Previous Week Only', index=False)
-
-
-                    # Auto-fit WoW sheets
-                    for sheet_name in ['WoW Summary', 'New This Week', 'Previous Week Only']:
-                        if sheet_name in writer.sheets:
-                            ws = writer.sheets[sheet_name]
-                            df_to_size = new_members if sheet_name == 'New This Week' else resolved if sheet_name == 'Previous Week Only' else wow_summary_df
-                            if df_to_size is not None and not df_to_size.empty:
-                                for idx, col in enumerate(df_to_size.columns):
-                                     col_letter = get_column_letter(idx + 1)
-                                     try: max_len = max(df_to_size[col].astype(str).map(len).max(), len(str(col)))
-                                     except: max_len = len(str(col))
-                                     adjusted_width = min((max_len + 2) * 1.1, 50)
-                                     ws.column_dimensions[col_letter].width = adjusted_width
-
-                # --- Insert Image (after closing ExcelWriter) ---
-                if img_filepath_to_insert and img_filepath_to_insert.exists():
+                          if not img_filepath_to_insert: print("  - Visualization PNG creation failed.")
+                    else: print("- Skipping Practice Escalation visualization (no data).")
+                else: print("- No current week data to write main analysis tabs.")
+
+                # --- 2. Perform WoW Comparison and Write Tabs ---
+                print("- Performing Week-over-Week comparison...")
+                new_members = pd.DataFrame()
+                resolved = pd.DataFrame()
+                wow_summary_dict = {'Metric': ['Current Week Escalations', 'Previous Week Escalations', 'New Escalations This Week', 'Removed Since Last Week', 'Net Change', 'Report Generated'], 'Value': [0, 0, 0, 0, 0, datetime.now().strftime('%Y-%m-%d %H:%M')]}
+                id_col = 'PayerMemberId' # Standardized name
+                if id_col not in current_df_comp.columns: print(f"  Warning: Comparison ID '{id_col}' not in current data for {market_code}.")
+                if id_col not in previous_df_comp.columns: print(f"  Warning: Comparison ID '{id_col}' not in previous data for {market_code}.")
+                if member_diff is None:
+                     member_diff = self.diff_member_weeks([{market_code: previous_df_comp}, {market_code: current_df_comp}], id_col)[0][market_code]
+
+                if member_diff['current_ids'] or member_diff['previous_ids']: # Only compare if we have some IDs
+                     if len(member_diff['new']):
+                          new_members = current_df_comp.iloc[member_diff['new']].reset_index(drop=True)
+                          print(f"  - Identified {len(new_members)} new escalations.")
+                     else: print("  - No new escalations identified.")
+
+                     if len(member_diff['dropped']):
+                          resolved = previous_df_comp.iloc[member_diff['dropped']].reset_index(drop=True)
+                          print(f"  - Identified {len(resolved)} removed escalations.")
+                     else: print("  - No escalations removed since last week.")
+                else:
+                     print("  - Skipping WoW comparison logic due to missing ID columns in data.")
+
+
+                wow_summary_dict['Value'][0] = member_diff['current_ids']
+                wow_summary_dict['Value'][1] = member_diff['previous_ids']
+                wow_summary_dict['Value'][2] = len(new_members)
+                wow_summary_dict['Value'][3] = len(resolved)
+                wow_summary_dict['Value'][4] = wow_summary_dict['Value'][0] - wow_summary_dict['Value'][1]
+                wow_summary_df = pd.DataFrame(wow_summary_dict)
+
+                print("- Writing Week-over-Week comparison sheets...")
+                writer.write_frame(wow_summary_df, 'WoW Summary', index=False)
+                # Provide default columns if dataframes are empty for WoW sheets
+                new_cols = new_members.columns if not new_members.empty else (current_df_comp.columns if not current_df_comp.empty else ['PayerMemberId','PatientName','MarketCode','PracticeName'])
+                res_cols = resolved.columns if not resolved.empty else (previous_df_comp.columns if not previous_df_comp.empty else new_cols)
+
+                columnar_frames['new_this_week'] = pd.DataFrame(new_members, columns=new_cols)
+                columnar_frames['previous_week_only'] = pd.DataFrame(resolved, columns=res_cols)
+                writer.write_frame(columnar_frames['new_this_week'], 'New This Week', index=False)
+                writer.write_frame(columnar_frames['previous_week_only'], 'Previous Week Only', index=False)
+
+
+                # Auto-fit WoW sheets
+                for sheet_name in ['WoW Summary', 'New This Week', 'Previous Week Only']:
+                    if sheet_name in writer.sheet_names:
+                        df_to_size = new_members if sheet_name == 'New This Week' else resolved if sheet_name == 'Previous Week Only' else wow_summary_df
+                        if df_to_size is not None and not df_to_size.empty:
+                            writer.set_column_widths(sheet_name, self.fit_column_widths(df_to_size, max_width=50))
+
+                # Streaming backends embed the chart while the workbook is still open
+                if img_filepath_to_insert and img_filepath_to_insert.exists() and writer.inline_images:
+                    writer.insert_image('Practice Chart', img_filepath_to_insert, 'B2')
+                    print(f"- Inserted image {img_filepath_to_insert.name} into sheet 'Practice Chart' at cell B2.")
+
+            print(f"- Workbook written with {writer.engine} in {writer.write_seconds:.2f}s")
+
+            # --- Insert Image (after closing ExcelWriter; inline-image writers inserted it above) ---
+            if not writer.inline_images and img_filepath_to_insert:
+                if img_filepath_to_insert.exists():
                     print(f"- Attempting to insert image {img_filepath_to_insert.name} into {file_path.name}...")
-                    self._insert_image_to_excel(file_path, img_filepath_to_insert, sheet_name='Practice Chart', cell='B2')
-                elif img_filepath_to_insert:
-                     print(f"- Image file not found, skipping insertion: {img_filepath_to_insert}")
+                    with self.recorder.record('step', 'insert_image', market=market_code):
+                        self._insert_image_to_excel(file_path, img_filepath_to_insert, sheet_name='Practice Chart', cell='B2')
+                else:
+                    print(f"- Image file not found, skipping insertion: {img_filepath_to_insert}")
+
+            if self.columnar_outputs:
+                with self.recorder.record('step', 'columnar', market=market_code) as entry:
+                    columnar_dir = self._write_columnar_outputs(market_code, columnar_frames, dict(zip(*wow_summary_dict.values())))
+                    entry['rows_out'] = sum(len(df) for df in columnar_frames.values())
+                result['columnar'] = columnar_dir.name
 
+            print(f"\nSuccessfully created report: {file_path.name}")
+            result['status'] = 'created'
 
-                print(f"\nSuccessfully created report: {file_path.name}")
+        except Exception as e:
+            print(f"\nError creating file for market {market_code}: {str(e)}")
+            import traceback
+            print(traceback.format_exc())
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        finally:
+            result['seconds'] = time.perf_counter() - start
+        return result
+
+class OpenpyxlReportWriter:
+    """
+    Report writer backend using pd.ExcelWriter with openpyxl. The whole workbook is kept in
+    memory until it is saved; images are inserted afterwards by re-opening the file.
+    """
+    engine = 'openpyxl'
+    inline_images = False
+
+    def __init__(self, file_path, date_format=None):
+        self.file_path = file_path
+        self.date_format = date_format # Number format for datetime columns (None keeps pandas' default)
+        self.write_seconds = 0.0
+        self._writer = pd.ExcelWriter(file_path, engine='openpyxl')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        start = time.perf_counter()
+        self._writer.close()
+        self.write_seconds += time.perf_counter() - start
+
+    @property
+    def sheet_names(self):
+        return list(self._writer.sheets)
+
+    def write_frame(self, df, sheet_name, index=False):
+        start = time.perf_counter()
+        date_positions = []
+        if self.date_format:
+            df, date_positions = _to_excel_serial_dates(df)
+        df.to_excel(self._writer, sheet_name=sheet_name, index=index)
+        if date_positions and len(df):
+            first_col = 1 + (df.index.nlevels if index else 0)
+            format_date_cells(self._writer.sheets[sheet_name], [first_col + position for position in date_positions],
+                              len(df), self.date_format)
+        self.write_seconds += time.perf_counter() - start
+
+    def set_column_widths(self, sheet_name, widths):
+        worksheet = self._writer.sheets[sheet_name]
+        for idx, width in enumerate(widths):
+            worksheet.column_dimensions[get_column_letter(idx + 1)].width = width
+
+
+class XlsxwriterReportWriter:
+    """
+    Report writer backend streaming rows to xlsxwriter in constant_memory mode: each row is
+    flushed to disk once the next one starts, so memory stays flat however large the data tab.
+    Rows are written in order by hand (DataFrame.to_excel writes column by column, which
+    constant_memory cannot handle). Header cells get the same bold/bordered style pandas uses.
+    """
+    engine = 'xlsxwriter'
+    inline_images = True
+
+    def __init__(self, file_path, date_format=None):
+        import xlsxwriter
+        self.file_path = file_path
+        self.write_seconds = 0.0
+        self._workbook = xlsxwriter.Workbook(str(file_path), {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'default_date_format': date_format or 'yyyy-mm-dd hh:mm:ss', # Same as pandas' default datetime_format
+        })
+        self._header_format = self._workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        self._date_cell_format = self._workbook.add_format({'num_format': date_format}) if date_format else None
+        self._worksheets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        start = time.perf_counter()
+        self._workbook.close()
+        self.write_seconds += time.perf_counter() - start
+
+    @property
+    def sheet_names(self):
+        return list(self._worksheets)
+
+    def _get_worksheet(self, sheet_name):
+        if sheet_name not in self._worksheets:
+            self._worksheets[sheet_name] = self._workbook.add_worksheet(sheet_name)
+        return self._worksheets[sheet_name]
+
+    def write_frame(self, df, sheet_name, index=False):
+        start = time.perf_counter()
+        worksheet = self._get_worksheet(sheet_name)
+        header_format = self._header_format
+        header = ([df.index.name] if index else []) + list(df.columns)
+        for col_idx, label in enumerate(header):
+            if label is not None:
+                worksheet.write(0, col_idx, label, header_format)
+
+        first_data_col = 1 if index else 0
+        cell_formats = [None] * len(header)
+        if self._date_cell_format is not None:
+            df, date_positions = _to_excel_serial_dates(df)
+            for position in date_positions:
+                cell_formats[first_data_col + position] = self._date_cell_format
+        for row_idx, row in enumerate(df.itertuples(index=index, name=None), start=1):
+            if index and not self._is_missing(row[0]):
+                worksheet.write(row_idx, 0, self._cell_value(row[0]), header_format)
+            for col_idx in range(first_data_col, len(row)):
+                value = row[col_idx]
+                if not self._is_missing(value):
+                    worksheet.write(row_idx, col_idx, self._cell_value(value), cell_formats[col_idx])
+        self.write_seconds += time.perf_counter() - start
+
+    @staticmethod
+    def _is_missing(value):
+        return value is None or value is pd.NaT or (isinstance(value, float) and value != value)
+
+    @staticmethod
+    def _cell_value(value):
+        if isinstance(value, (str, bool, int, float, datetime)):
+            return value
+        return str(value)
+
+    def set_column_widths(self, sheet_name, widths):
+        worksheet = self._worksheets[sheet_name]
+        for idx, width in enumerate(widths):
+            worksheet.set_column(idx, idx, width)
+
+    def insert_image(self, sheet_name, image_path, cell):
+        self._get_worksheet(sheet_name).insert_image(cell, str(image_path))
+
+
+def _to_excel_serial_dates(df):
+    """
+    Return (df, positions): a copy of df with its datetime64 columns as Excel serial day
+    numbers (1900 date system), and those columns' positions. Writing numbers with a date
+    format is much cheaper for the writers than converting every Timestamp cell.
+    """
+    positions = [position for position, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if not positions:
+        return df, positions
+    df = df.copy()
+    for position in positions:
+        days = (df.iloc[:, position] - pd.Timestamp('1899-12-31')) / pd.Timedelta(days=1)
+        df.isetitem(position, days.where(days <= 59, days + 1)) # Skip Excel's phantom 1900-02-29
+    return df, positions
+
+
+# Practice chart presets (WorklistAnalyzer.chart_preset): output DPI, figure width, height per
+# practice row, minimum height and an optional height cap (inches). 'print' is the original chart.
+CHART_PRESETS = {
+    'print': {'dpi': 300, 'width': 10, 'row_height': 0.35, 'min_height': 6, 'max_height': None},
+    'screen': {'dpi': 150, 'width': 10, 'row_height': 0.35, 'min_height': 6, 'max_height': None},
+    'compact': {'dpi': 150, 'width': 10, 'row_height': 0.25, 'min_height': 5, 'max_height': 40},
+    'draft': {'dpi': 96, 'width': 10, 'row_height': 0.25, 'min_height': 5, 'max_height': 40},
+}
+
+
+class PracticeChartRenderer:
+    """
+    Renders the stacked practice escalation bar chart off-screen. Uses one reusable Figure on an
+    Agg canvas (no pyplot state), applies the chart style once per process, and sizes and saves
+    the chart according to one of CHART_PRESETS.
+    """
+    STYLE = 'seaborn-v0_8-whitegrid'
+    _style_applied = False
+
+    def __init__(self, preset='print'):
+        import matplotlib
+        matplotlib.use('Agg') # Off-screen only; pandas' plotting imports pyplot, which would otherwise load a GUI backend
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        if preset not in CHART_PRESETS:
+            raise ValueError(f"Unknown chart preset '{preset}'. Use one of: {list(CHART_PRESETS)}")
+        self.preset = CHART_PRESETS[preset]
+        if not PracticeChartRenderer._style_applied:
+            import matplotlib.style
+            matplotlib.style.use(self.STYLE)
+            PracticeChartRenderer._style_applied = True
+        self._figure = Figure() # Created after the style so it picks up the style's figure settings
+        FigureCanvasAgg(self._figure)
+
+    def render(self, viz_df, market_code, plot_filepath):
+        """ Draw viz_df (practices x escalation types) and save it as a PNG. Returns the render time in seconds. """
+        start = time.perf_counter()
+        preset = self.preset
+        fig = self._figure
+        fig.clear()
+        fig_height = max(preset['min_height'], len(viz_df) * preset['row_height'])
+        if preset['max_height']:
+            fig_height = min(fig_height, preset['max_height'])
+        fig.set_size_inches(preset['width'], fig_height)
+        ax = fig.add_subplot()
+        try:
+            viz_df.plot(kind='barh', stacked=True, ax=ax, colormap='viridis')
+
+            ax.set_title(f'{market_code} Escalations by Practice', pad=15, fontsize=12, weight='bold')
+            ax.set_xlabel('# of Escalations', fontsize=10); ax.set_ylabel('')
+            ax.tick_params(axis='y', labelsize=8); ax.tick_params(axis='x', labelsize=9)
+
+            for container in ax.containers:
+                labels = [f'{int(v)}' if v > 0 else '' for v in container.datavalues]
+                ax.bar_label(container, labels=labels, label_type='center', fontsize=7, color='white', weight='bold')
+
+            ax.invert_yaxis()
+            ax.legend(title='Escalation Type', bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=9, title_fontsize=10)
+            fig.tight_layout(rect=[0, 0, 0.9, 1])
+            fig.savefig(plot_filepath, dpi=preset['dpi'], bbox_inches='tight')
+        finally:
+            fig.clear() # Drop the artists so the next chart starts from an empty figure
+        return time.perf_counter() - start
 
+
+_chart_renderers = {} # One renderer (and figure) per preset per process
+
+
+def _get_chart_renderer(preset):
+    if preset not in _chart_renderers:
+        _chart_renderers[preset] = PracticeChartRenderer(preset)
+    return _chart_renderers[preset]
+
+
+def _peak_rss_mb():
+    """ Peak resident set size of this process so far, in MB (None if it cannot be measured). """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024 # bytes on macOS, KB on Linux
+    except ImportError:
+        pass
+    if sys.platform == 'win32':
+        try:
+            return _windows_peak_working_set() / 1024 / 1024
+        except OSError:
+            return None
+    return None
+
+
+def _windows_peak_working_set():
+    """ PeakWorkingSetSize of this process in bytes, from psapi's GetProcessMemoryInfo (Windows has no resource module). """
+    import ctypes
+
+    class ProcessMemoryCounters(ctypes.Structure): # PROCESS_MEMORY_COUNTERS
+        _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong)] + [
+            (name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    kernel32, psapi = ctypes.WinDLL('kernel32'), ctypes.WinDLL('psapi')
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    psapi.GetProcessMemoryInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(ProcessMemoryCounters), ctypes.c_ulong]
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        raise ctypes.WinError()
+    return counters.PeakWorkingSetSize
+
+
+class RunRecorder:
+    """
+    Records wall time, CPU time, rows in / out and memory for the pipeline stages of a run and
+    for each file, sheet and market. Every record() block appends one entry to self.records;
+    the block fills in rows_in / rows_out (and any other field) on the yielded entry. Memory
+    is the process's peak RSS, plus the block's peak Python allocation when trace_memory is
+    on (tracemalloc slows allocation-heavy code down noticeably, so it is off by default).
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._traced_peaks = [] # Highest traced allocation seen so far in each open block
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def record(self, kind, name, **fields):
+        entry = {'kind': kind, 'name': name, 'rows_in': None, 'rows_out': None, **fields}
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc has one peak counter: fold it into the enclosing block before resetting it
+            if self._traced_peaks:
+                self._traced_peaks[-1] = max(self._traced_peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._traced_peaks.append(0)
+        rss_before = _peak_rss_mb()
+        entry['started_at'] = round(time.time(), 3) # Epoch seconds, so records from worker processes line up
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield entry
+        finally:
+            entry['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            entry['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+            rss_peak = _peak_rss_mb()
+            entry['peak_rss_mb'] = round(rss_peak, 1) if rss_peak is not None else None
+            entry['peak_rss_growth_mb'] = round(rss_peak - rss_before, 1) if rss_peak is not None else None
+            if tracing:
+                traced_peak = max(tracemalloc.get_traced_memory()[1], self._traced_peaks.pop())
+                entry['traced_peak_mb'] = round(traced_peak / 1024 / 1024, 2)
+                if self._traced_peaks:
+                    self._traced_peaks[-1] = max(self._traced_peaks[-1], traced_peak)
+            entry['pid'] = os.getpid()
+            self.records.append(entry)
+
+    def of_kind(self, kind):
+        """ Records of one kind, in the order their blocks started. """
+        return sorted((entry for entry in self.records if entry['kind'] == kind), key=lambda entry: entry['started_at'])
+
+    def close(self):
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+
+# Backends selectable through WorklistAnalyzer.writer_engine
+REPORT_WRITERS = {'openpyxl': OpenpyxlReportWriter, 'xlsxwriter': XlsxwriterReportWriter}
+
+
+_worker_analyzer = None # One analyzer per ingestion worker process, so resolved headers are reused across files
+
+
+def _load_worklist_file_in_worker(settings, file_path, desired_columns, date_columns, is_comparison_data):
+    """
+    Process-pool entry point for parallel ingestion: parse one worklist file with the worker's
+    analyzer configured from settings. Returns (filtered_df, records_scanned, error, log,
+    header_stats, records) so the parent can replay the printed log in file order, add up the
+    header resolver counts and keep this file's RunRecorder records.
+    """
+    global _worker_analyzer
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        if _worker_analyzer is None:
+            _worker_analyzer = WorklistAnalyzer()
+        analyzer = _worker_analyzer
+        for name, value in settings.items():
+            setattr(analyzer, name, value)
+        analyzer.recorder = RunRecorder(analyzer.trace_memory)
+        stats_before = dict(analyzer.header_resolver.stats)
+        with analyzer.recorder.record('file', file_path.name, view='comparison' if is_comparison_data else 'full',
+                                      source='parsed') as entry:
+            try:
+                filtered_df, records_scanned = analyzer._load_worklist_file(
+                    file_path, desired_columns, date_columns, is_comparison_data)
+                error = None
             except Exception as e:
-                print(f"\nError creating file for market {market_code}: {str(e)}")
-                import traceback
-                print(traceback.format_exc())
+                filtered_df, records_scanned, error = None, 0, str(e)
+            entry.update(rows_in=records_scanned, rows_out=0 if filtered_df is None else len(filtered_df), error=error)
+    header_stats = {name: count - stats_before[name] for name, count in analyzer.header_resolver.stats.items()}
+    return filtered_df, records_scanned, error, log.getvalue(), header_stats, analyzer.recorder.records
+
+
+def _create_market_file_in_worker(settings, market_code, current_df_full, current_df_comp, previous_df_comp, member_diff=None):
+    """
+    Process-pool entry point for parallel report generation: build one market's report with a
+    fresh analyzer configured from settings. Returns (result, log, records) so the parent can
+    replay the printed log in market order and keep the market's RunRecorder records.
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        analyzer = WorklistAnalyzer()
+        for name, value in settings.items():
+            setattr(analyzer, name, value)
+        analyzer.recorder = RunRecorder(analyzer.trace_memory)
+        result = analyzer._create_single_market_file(market_code, current_df_full, current_df_comp, previous_df_comp, member_diff)
+    return result, log.getvalue(), analyzer.recorder.records
 
 
-def main():
-    
+def parse_args(argv=None):
+    """ Command-line options; the defaults are the usual weekly run's settings. """
     BASE_PATH = r"C:/Users/pcastillo/OneDrive - VillageMD/Documents - VMD- Quality Leadership- PHI/Data Updates/MedAdhData Dropzone/"
     OUTPUT_FOLDER = r"C:/Users/pcastillo/OneDrive - VillageMD/Desktop/Escalation Python/"
+    # Local cache of parsed worklists; unchanged files are not re-parsed on the next run. --no-cache disables it.
+    CACHE_FOLDER = r"C:/Users/pcastillo/Desktop/Escalation Python Cache/"
+    # Local history of each processed week's escalations; last week's WoW data is read from here. --no-history disables it.
+    HISTORY_DB = r"C:/Users/pcastillo/Desktop/Escalation Python Cache/escalation_history.sqlite"
+    WORKERS = os.cpu_count() or 1 # Worker processes for parsing files and building reports (1 = serial)
     # OUTPUT_FOLDER = r"C:/Users/pcastillo/OneDrive - VillageMD/Desktop/Escalation Python Output/" # Test output
 
-    # *** Set the date for the CURRENT week's report here (MM.DD format) ***
+    # *** Default date for the CURRENT week's report (MM.DD format) ***
     # Should correspond to the date prefix in the input filenames for that week
-    CURRENT_WEEK_DATE = "04.28" # <-- CHANGE THIS (e.g., "04.29" if running on April 29th for week of April 28th)
+    CURRENT_WEEK_DATE = "04.28" # <-- Or pass --dates (e.g., --dates 04.29 if running on April 29th for week of April 28th)
+
+    parser = argparse.ArgumentParser(description="Build the weekly Med Adherence escalation reports with week-over-week comparison.")
+    parser.add_argument('--dates', nargs='+', default=[CURRENT_WEEK_DATE], metavar='MM.DD',
+                        help='week(s) to report on, processed in order in one process (default: %(default)s)')
+    parser.add_argument('--markets', nargs='+', metavar='CODE', help='only build reports for these market codes (default: all)')
+    parser.add_argument('--base-path', default=BASE_PATH, help='folder holding the "Week of" worklist folders')
+    parser.add_argument('--output-folder', default=OUTPUT_FOLDER, help='folder the reports and charts are written to')
+    parser.add_argument('--cache-folder', default=CACHE_FOLDER, help='Parquet cache of parsed worklists')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the worklist cache')
+    parser.add_argument('--history-db', default=HISTORY_DB, help='SQLite history of each week\'s comparison rows')
+    parser.add_argument('--no-history', action='store_true', help='do not use the history store')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='worker processes for parsing and reports (default: %(default)s)')
+    parser.add_argument('--report-workers', type=int, help='worker processes for reports (default: --workers)')
+    parser.add_argument('--reader-mode', choices=['streaming', 'pandas'], default='streaming')
+    parser.add_argument('--writer-engine', choices=list(REPORT_WRITERS), default='openpyxl')
+    parser.add_argument('--date-mode', choices=['text', 'excel'], default='text')
+    parser.add_argument('--chart-preset', choices=list(CHART_PRESETS), default='print')
+    parser.add_argument('--trace-memory', action='store_true', help='record peak Python allocations per stage (slower)')
+    parser.add_argument('--no-run-report', action='store_true', help='do not write the JSON run report')
+    parser.add_argument('--force', action='store_true', help='rebuild every market report, even the unchanged ones')
+    parser.add_argument('--columnar-outputs', action='store_true',
+                        help="also write each market's data, pivots and WoW lists as Parquet plus a summary JSON")
+    parser.add_argument('--watch', action='store_true',
+                        help='keep watching the (last) --dates week and rebuild the reports of changed markets as worklists land')
+    parser.add_argument('--poll-interval', type=float, default=30, help='seconds between folder polls in --watch mode')
+    parser.add_argument('--debounce', type=float, default=10,
+                        help='seconds a changed worklist must stay unchanged before --watch processes it')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
     # --- Execution ---
     try:
         print("--- Starting Worklist Analysis and WoW Comparison ---")
         start_time = datetime.now()
         analyzer = WorklistAnalyzer()
-        analyzer.base_path = Path(BASE_PATH)
-        analyzer.output_folder = Path(OUTPUT_FOLDER)
+        analyzer.base_path = Path(args.base_path)
+        analyzer.output_folder = Path(args.output_folder)
+        analyzer.cache_folder = Path(args.cache_folder) if args.cache_folder and not args.no_cache else None
+        analyzer.history_db = Path(args.history_db) if args.history_db and not args.no_history else None
+        analyzer.max_workers = args.workers
+        analyzer.report_workers = args.report_workers if args.report_workers is not None else args.workers
+        analyzer.reader_mode = args.reader_mode
+        analyzer.writer_engine = args.writer_engine
+        analyzer.date_mode = args.date_mode
+        analyzer.chart_preset = args.chart_preset
+        analyzer.markets = args.markets
+        analyzer.trace_memory = args.trace_memory
+        analyzer.run_report = not args.no_run_report
+        analyzer.force_rebuild = args.force
+        analyzer.columnar_outputs = args.columnar_outputs
 
-        analyzer.output_folder.mkdir(parents=True, exist_ok=True)
         print(f"Using Base Path: {analyzer.base_path}")
         print(f"Using Output Folder: {analyzer.output_folder}")
+        if analyzer.cache_folder: print(f"Using Cache Folder: {analyzer.cache_folder}")
 
-        analyzer.set_date(CURRENT_WEEK_DATE) # Sets current and previous dates
-
-        # Process current week for main analysis dataframes
-        current_market_data = analyzer.process_worklists()
-
-        # Create the market files (which includes WoW comparison using helper methods)
-        if current_market_data:
-            analyzer.create_market_files(current_market_data)
-            print("\n--- Processing complete! ---")
+        # One analyzer for every week, so parsed weeks and resolved headers carry over
+        if args.watch:
+            analyzer.run_weeks(args.dates[:-1])
+            analyzer.watch_week(args.dates[-1], interval=args.poll_interval, debounce=args.debounce)
         else:
-            print("\n--- No data found for the current week. No reports generated. ---")
+            week_results = analyzer.run_weeks(args.dates)
+            if any(week_results.values()):
+                print("\n--- Processing complete! ---")
 
         end_time = datetime.now()
         print(f"Total execution time: {end_time - start_time}")
@@ -638,7 +2331,7 @@ def main():
     except ValueError as ve:
          print(f"Configuration Error: {str(ve)}")
     except FileNotFoundError as fnfe:
-         print(f"Path Error: {str(fnfe)}. Please check BASE_PATH and OUTPUT_FOLDER.")
+         print(f"Path Error: {str(fnfe)}. Please check --base-path and --output-folder.")
     except Exception as e:
         print(f"\n--- An unexpected error occurred during main execution ---")
         print(f"Error: {str(e)}")
@@ -0,0 +1,89 @@
+"""
+Benchmark: pivot tables and summary metrics for one market.
+
+Compares the previous create_pivot_tables (two pd.pivot_table(..., margins=True)
+calls plus the _create_summary_data masks / nunique scans) with the single grouped
+count in WorklistAnalyzer._aggregate_escalations, and checks both give equal pivots.
+
+Usage: python benchmarks/bench_aggregation.py [--practices 300] [--providers 1500]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import WorklistAnalyzer
+
+
+def make_market(rows, num_practices, num_providers, seed=0):
+    """ A market-sized frame with a few missing practices, providers and member ids. """
+    rng = np.random.default_rng(seed)
+    practices = np.array([f"Practice {p:04d}" for p in range(num_practices)], dtype=object)
+    providers = np.array([f"Provider {p:05d}" for p in range(num_providers)], dtype=object)
+    df = pd.DataFrame({
+        'PayerMemberId': rng.integers(10**8, 10**9, rows).astype(object),
+        'PracticeName': practices[rng.integers(0, num_practices, rows)],
+        'PCP': providers[rng.integers(0, num_providers, rows)],
+        'Escalation Path': rng.choice(['Market/PHO Escalation', 'Practice Escalation'], rows),
+    })
+    for col, share in [('PracticeName', 0.01), ('PCP', 0.05), ('PayerMemberId', 0.005)]:
+        df.loc[rng.random(rows) < share, col] = None
+    return df
+
+
+def legacy_pivot_tables(analyzer, df):
+    """ The previous create_pivot_tables body. """
+    pivots = {}
+    pivots['Practice_Escalations'] = pd.pivot_table(
+        df, index='PracticeName', columns='Escalation Path', values='PayerMemberId',
+        aggfunc='count', fill_value=0, margins=True, margins_name='Total'
+    ).sort_values('Total', ascending=False)
+    df['PCP'] = df['PCP'].fillna('Unknown Provider')
+    pivots['Provider_Escalations'] = pd.pivot_table(
+        df, index='PCP', columns='Escalation Path', values='PayerMemberId',
+        aggfunc='count', fill_value=0, margins=True, margins_name='Total'
+    ).sort_values('Total', ascending=False)
+    pivots['Summary'] = pd.DataFrame(analyzer._create_summary_data(df))
+    return pivots
+
+
+def time_call(func, df, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        frame = df.copy() # Both versions fill missing providers in place
+        start = time.perf_counter()
+        func(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--practices', type=int, default=300)
+    parser.add_argument('--providers', type=int, default=1500)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    analyzer = WorklistAnalyzer()
+    print(f"{args.practices} practices, {args.providers} providers")
+    print(f"{'rows':>9} {'pivot_table s':>14} {'grouped count s':>16} {'speedup':>8}")
+    for rows in args.rows:
+        df = make_market(rows, args.practices, args.providers)
+
+        expected = legacy_pivot_tables(analyzer, df.copy())
+        actual = analyzer.create_pivot_tables(df.copy())
+        for name in ['Practice_Escalations', 'Provider_Escalations']:
+            pd.testing.assert_frame_equal(expected[name], actual[name])
+        pd.testing.assert_frame_equal(expected['Summary'].iloc[:5], actual['Summary'].iloc[:5])
+
+        legacy = time_call(lambda frame: legacy_pivot_tables(analyzer, frame), df)
+        engine = time_call(analyzer.create_pivot_tables, df)
+        print(f"{rows:>9} {legacy:>14.4f} {engine:>16.4f} {legacy / engine:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: practice chart rendering.
+
+Renders the same practice pivot with the previous pyplot-based code (style applied
+and a new figure created for every chart) and with PracticeChartRenderer at each
+of the CHART_PRESETS, for a small and a large market.
+
+Usage: python benchmarks/bench_charts.py [--practices 20 200] [--charts 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import CHART_PRESETS, PracticeChartRenderer
+
+
+def make_viz_df(num_practices, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Market/PHO Escalation': rng.integers(0, 40, num_practices),
+                       'Practice Escalation': rng.integers(0, 40, num_practices)},
+                      index=pd.Index([f"Practice {p:03d}" for p in range(num_practices)], name='PracticeName'))
+    df.columns.name = 'Escalation Path'
+    return df
+
+
+def legacy_render(viz_df, market_code, plot_filepath):
+    """ The previous create_practice_visualization drawing code. """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    start = time.perf_counter()
+    plt.style.use('seaborn-v0_8-whitegrid')
+    fig, ax = plt.subplots(figsize=(10, max(6, len(viz_df) * 0.35)))
+    viz_df.plot(kind='barh', stacked=True, ax=ax, colormap='viridis')
+    ax.set_title(f'{market_code} Escalations by Practice', pad=15, fontsize=12, weight='bold')
+    ax.set_xlabel('# of Escalations', fontsize=10); ax.set_ylabel('')
+    ax.tick_params(axis='y', labelsize=8); ax.tick_params(axis='x', labelsize=9)
+    for container in ax.containers:
+        labels = [f'{int(v)}' if v > 0 else '' for v in container.datavalues]
+        ax.bar_label(container, labels=labels, label_type='center', fontsize=7, color='white', weight='bold')
+    ax.invert_yaxis()
+    ax.legend(title='Escalation Type', bbox_to_anchor=(1.02, 1), loc='upper left', fontsize=9, title_fontsize=10)
+    plt.tight_layout(rect=[0, 0, 0.9, 1])
+    plt.savefig(plot_filepath, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--practices', type=int, nargs='+', default=[20, 200])
+    parser.add_argument('--charts', type=int, default=5, help='charts rendered per configuration')
+    args = parser.parse_args()
+
+    print(f"Mean seconds per chart over {args.charts} charts")
+    print(f"{'practices':>9} {'pyplot (old)':>13} " + " ".join(f"{name:>9}" for name in CHART_PRESETS))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for num_practices in args.practices:
+            viz_df = make_viz_df(num_practices)
+            png = Path(out_dir) / 'chart.png'
+            legacy = np.mean([legacy_render(viz_df, 'MKT', png) for _ in range(args.charts)])
+            preset_seconds = []
+            for name in CHART_PRESETS:
+                renderer = PracticeChartRenderer(name)
+                preset_seconds.append(np.mean([renderer.render(viz_df, 'MKT', png) for _ in range(args.charts)]))
+            print(f"{num_practices:>9} {legacy:>13.2f} " + " ".join(f"{seconds:>9.2f}" for seconds in preset_seconds))
+
+
+if __name__ == "__main__":
+    main()
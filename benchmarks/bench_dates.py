@@ -0,0 +1,84 @@
+"""
+Benchmark: date columns as mm/dd/yyyy text vs datetime64 with an Excel number format.
+
+Times the ingestion step for the nine worklist date columns (pd.to_datetime plus
+.dt.strftime in 'text' mode, pd.to_datetime alone in 'excel' mode) and writing
+those columns with each report writer backend, and reports their memory.
+
+Usage: python benchmarks/bench_dates.py [--rows 20000 100000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import REPORT_WRITERS, WorklistAnalyzer
+
+DATE_COLUMNS = [
+    'LastImpactableDate','DateOfBirth','LastFillDate','NextFillDate',
+    'Initial Fill Date','Last Activity Date','DataAsOfDate',
+    'Escalation Timeframe','Escalation Deadline'
+]
+
+
+def make_raw_dates(rows, seed=0):
+    """ Date columns as read from a worklist: datetime objects with a few blanks. """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col in DATE_COLUMNS:
+        values = (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 900, rows), unit='D')).to_pydatetime().astype(object)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def parse_dates(raw, date_mode):
+    df = raw.copy()
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+        if date_mode != 'excel':
+            df[col] = df[col].dt.strftime('%m/%d/%Y')
+    return df
+
+
+def time_call(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def write_dates(engine, df, date_mode, out_dir):
+    date_format = WorklistAnalyzer.EXCEL_DATE_FORMAT if date_mode == 'excel' else None
+    with REPORT_WRITERS[engine](Path(out_dir) / f"{engine}_{date_mode}.xlsx", date_format=date_format) as writer:
+        writer.write_frame(df, 'Dates', index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000])
+    args = parser.parse_args()
+
+    print(f"{len(DATE_COLUMNS)} date columns")
+    print(f"{'rows':>7} {'mode':>6} {'parse s':>8} {'memory MB':>10} " + " ".join(f"{engine + ' write s':>18}" for engine in REPORT_WRITERS))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for rows in args.rows:
+            raw = make_raw_dates(rows)
+            for date_mode in ['text', 'excel']:
+                parse_seconds, df = time_call(lambda: parse_dates(raw, date_mode))
+                memory_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+                write_seconds = [time_call(lambda: write_dates(engine, df, date_mode, out_dir), repeat=1)[0]
+                                 for engine in REPORT_WRITERS]
+                print(f"{rows:>7} {date_mode:>6} {parse_seconds:>8.3f} {memory_mb:>10.1f} "
+                      + " ".join(f"{seconds:>18.2f}" for seconds in write_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: loading a worklist from XLSX vs CSV vs Parquet.
+
+Generates worklist workbooks with make_worklists.generate_weeks, exports the same
+worklist sheet to CSV and Parquet (text ids, as an upstream extract would write
+them), and times WorklistAnalyzer._load_worklist_file on each format: reading,
+column resolution, date formatting and escalation filtering. The cleaned frames
+of the three formats are checked to be identical.
+
+Usage: python benchmarks/bench_formats.py [--rows 5000 50000] [--repeat 3] [--date-mode text]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import WorklistAnalyzer
+from make_worklists import DATE_COLUMNS, generate_weeks
+
+FORMATS = ['xlsx', 'csv', 'parquet']
+
+
+def export_worklist(xlsx_path):
+    """ Write the workbook's worklist sheet next to it as CSV and Parquet. """
+    df = pd.read_excel(xlsx_path, sheet_name=0)
+    df.to_csv(xlsx_path.with_suffix('.csv'), index=False)
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) not in ('string', 'empty'):
+            df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value)) # Mixed ids as text
+    df.to_parquet(xlsx_path.with_suffix('.parquet'), index=False)
+
+
+def time_load(analyzer, file_path, desired_columns, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = analyzer._load_worklist_file(file_path, desired_columns, DATE_COLUMNS, False)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 50000], help='worklist rows per file')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--date-mode', choices=['text', 'excel'], default='text')
+    args = parser.parse_args()
+
+    analyzer = WorklistAnalyzer()
+    analyzer.date_mode = args.date_mode
+    desired_columns = WorklistAnalyzer.FULL_COLUMNS + [
+        col for col in WorklistAnalyzer.COMPARISON_COLUMNS if col not in WorklistAnalyzer.FULL_COLUMNS]
+
+    print(f"Best of {args.repeat} loads (read + clean + filter) of one worklist, seconds")
+    print(f"{'rows':>7} " + " ".join(f"{fmt:>9}" for fmt in FORMATS) + " " + " ".join(f"{fmt + ' x':>10}" for fmt in FORMATS[1:]))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_rows in args.rows:
+            xlsx_path = generate_weeks(Path(temp_dir) / f"rows_{num_rows}", weeks=('04.28',), rows=num_rows,
+                                       sheets=1, markets=1)[0]
+            export_worklist(xlsx_path)
+            seconds, frames = {}, {}
+            for fmt in FORMATS:
+                seconds[fmt], (frames[fmt], _) = time_load(analyzer, xlsx_path.with_suffix(f".{fmt}"),
+                                                           desired_columns, args.repeat)
+            for fmt in FORMATS[1:]:
+                pd.testing.assert_frame_equal(frames[fmt], frames['xlsx'], check_dtype=False)
+            print(f"{num_rows:>7} " + " ".join(f"{seconds[fmt]:>9.3f}" for fmt in FORMATS) + " "
+                  + " ".join(f"{seconds['xlsx'] / seconds[fmt]:>9.1f}x" for fmt in FORMATS[1:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: week-over-week member diff.
+
+Compares the previous per-market logic (Python sets of PayerMemberId, set
+differences, then isin + drop_duplicates to pull the rows back) with
+WorklistAnalyzer.diff_member_weeks, which diffs every market in one pass over
+factorized member ids, and checks both pick the same rows.
+
+Usage: python benchmarks/bench_member_diff.py [--members 1000000 2000000] [--markets 25]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import WorklistAnalyzer
+
+ID_COL = 'PayerMemberId'
+
+
+def make_weeks(num_members, num_markets, churn=0.1, seed=0):
+    """ Two weeks of per-market comparison frames; churn of the members change between weeks. """
+    rng = np.random.default_rng(seed)
+    pool = rng.choice(10**10, size=int(num_members * (1 + churn)), replace=False)
+    previous_ids = pool[:num_members]
+    current_ids = np.concatenate([previous_ids[int(num_members * churn):], pool[num_members:]])
+    weeks = []
+    for ids in (previous_ids, current_ids):
+        ids = np.concatenate([ids, rng.choice(ids, len(ids) // 20)]) # A few members escalated twice
+        markets = rng.integers(0, num_markets, len(ids))
+        frame = pd.DataFrame({ID_COL: ids, 'MarketCode': markets, 'PatientName': 'Name'})
+        weeks.append({f"MKT{m:02d}": df.reset_index(drop=True) for m, df in frame.groupby('MarketCode')})
+    return weeks
+
+
+def legacy_diff(previous_market_dfs, current_market_dfs):
+    """ The previous per-market set logic from _create_single_market_file. """
+    results = {}
+    for market in sorted(set(previous_market_dfs) | set(current_market_dfs)):
+        current_df = current_market_dfs.get(market, pd.DataFrame())
+        previous_df = previous_market_dfs.get(market, pd.DataFrame())
+        current_ids = set(current_df[ID_COL].dropna().unique())
+        prev_ids = set(previous_df[ID_COL].dropna().unique())
+        new_ids = current_ids - prev_ids
+        resolved_ids = prev_ids - current_ids
+        new_members = current_df[current_df[ID_COL].isin(new_ids)].drop_duplicates(subset=[ID_COL]).reset_index(drop=True)
+        resolved = previous_df[previous_df[ID_COL].isin(resolved_ids)].drop_duplicates(subset=[ID_COL]).reset_index(drop=True)
+        results[market] = (len(current_ids), len(prev_ids), new_members, resolved)
+    return results
+
+
+def engine_diff(analyzer, previous_market_dfs, current_market_dfs):
+    diffs = analyzer.diff_member_weeks([previous_market_dfs, current_market_dfs])[0]
+    results = {}
+    for market, diff in diffs.items():
+        current_df = current_market_dfs.get(market, pd.DataFrame())
+        previous_df = previous_market_dfs.get(market, pd.DataFrame())
+        results[market] = (diff['current_ids'], diff['previous_ids'],
+                           current_df.iloc[diff['new']].reset_index(drop=True),
+                           previous_df.iloc[diff['dropped']].reset_index(drop=True))
+    return results
+
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--members', type=int, nargs='+', default=[100000, 1000000, 2000000])
+    parser.add_argument('--markets', type=int, default=25)
+    args = parser.parse_args()
+
+    analyzer = WorklistAnalyzer()
+    print(f"{args.markets} markets, 10% churn between weeks")
+    print(f"{'members':>9} {'sets + isin s':>14} {'diff engine s':>14} {'speedup':>8}")
+    for num_members in args.members:
+        previous_market_dfs, current_market_dfs = make_weeks(num_members, args.markets)
+        legacy_seconds, expected = time_call(legacy_diff, previous_market_dfs, current_market_dfs)
+        engine_seconds, actual = time_call(engine_diff, analyzer, previous_market_dfs, current_market_dfs)
+        for market, (current_count, previous_count, new_members, resolved) in expected.items():
+            assert actual[market][:2] == (current_count, previous_count)
+            pd.testing.assert_frame_equal(actual[market][2], new_members)
+            pd.testing.assert_frame_equal(actual[market][3], resolved)
+        print(f"{num_members:>9} {legacy_seconds:>14.3f} {engine_seconds:>14.3f} {legacy_seconds / engine_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
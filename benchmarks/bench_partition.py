@@ -0,0 +1,85 @@
+"""
+Benchmark: per-market partitioning of the collected worklist frames.
+
+Compares the old accumulate-as-you-go approach (a boolean mask and a pd.concat
+per market for every file) with WorklistAnalyzer._partition_by_market, which
+concatenates once and splits with a single groupby. Time per sheet should stay
+flat for the new approach as the sheet count grows.
+
+Usage: python benchmarks/bench_partition.py [--markets 30] [--rows 400]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import WorklistAnalyzer
+
+
+def make_sheets(num_sheets, num_markets, rows_per_sheet, seed=0):
+    """ Build filtered-looking frames (one per sheet) spread across num_markets markets. """
+    rng = np.random.default_rng(seed)
+    columns = WorklistAnalyzer.FULL_COLUMNS
+    sheets = []
+    for _ in range(num_sheets):
+        data = {col: rng.integers(0, 1000, rows_per_sheet).astype(str) for col in columns}
+        data['MarketCode'] = np.array([f"MKT{m:03d}" for m in rng.integers(0, num_markets, rows_per_sheet)])
+        data['Escalation Path'] = rng.choice(['Market/PHO Escalation', 'Practice Escalation'], rows_per_sheet)
+        sheets.append(pd.DataFrame(data, columns=columns))
+    return sheets
+
+
+def legacy_partition(frames):
+    """ The previous per-file accumulation loop from _process_single_week_data. """
+    market_dfs = {}
+    for filtered_df in frames:
+        for market_code in filtered_df['MarketCode'].dropna().unique():
+            market_df = filtered_df[filtered_df['MarketCode'] == market_code].copy()
+            market_code_str = str(market_code).strip()
+            if market_code_str in market_dfs:
+                market_dfs[market_code_str] = pd.concat([market_dfs[market_code_str], market_df], ignore_index=True)
+            else:
+                market_dfs[market_code_str] = market_df
+    return market_dfs
+
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--markets', type=int, default=30)
+    parser.add_argument('--rows', type=int, default=400, help='rows per sheet')
+    parser.add_argument('--sheets', type=int, nargs='+', default=[10, 20, 40, 80, 160])
+    args = parser.parse_args()
+
+    analyzer = WorklistAnalyzer()
+    print(f"{args.markets} markets, {args.rows} rows per sheet, {len(WorklistAnalyzer.FULL_COLUMNS)} columns")
+    print(f"{'sheets':>7} {'legacy s':>10} {'ms/sheet':>9} {'partition s':>12} {'ms/sheet':>9} {'speedup':>8}")
+    for num_sheets in args.sheets:
+        frames = make_sheets(num_sheets, args.markets, args.rows)
+
+        # Same markets, same row counts
+        expected = legacy_partition(frames)
+        actual = analyzer._partition_by_market(frames)
+        assert list(expected) == list(actual)
+        assert all(len(expected[m]) == len(actual[m]) for m in expected)
+
+        legacy = time_call(legacy_partition, frames)
+        partition = time_call(analyzer._partition_by_market, frames)
+        print(f"{num_sheets:>7} {legacy:>10.3f} {legacy / num_sheets * 1000:>9.2f} "
+              f"{partition:>12.3f} {partition / num_sheets * 1000:>9.2f} {legacy / partition:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: end-to-end weekly run of both scripts on synthetic worklists, per stage.
+
+Generates two weeks of worklists with make_worklists.generate_weeks at each scale,
+runs ComparisonScript (current week 04.28 against 04.21) and Better_script (04.28)
+serially in this process, and reports the seconds spent in each stage:
+
+  discover   finding the week folder and its workbooks
+  read       opening and parsing the workbooks
+  clean      column resolution, date formatting and escalation filtering
+  partition  splitting by market (and compacting dtypes in ComparisonScript)
+  pivot      pivot tables and summary
+  write      writing the report workbooks
+  chart      practice charts
+  WoW        previous week's comparison data and the member diff (ComparisonScript only)
+  other      everything else
+
+Stage times are exclusive: a stage called from inside another is only counted once.
+
+Usage: python benchmarks/bench_pipeline.py [--rows 1000 5000 20000] [--markets 4] [--sheets 2] [--keep DIR]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import Better_script
+import ComparisonScript
+from make_worklists import generate_weeks
+
+STAGES = ['discover', 'read', 'clean', 'partition', 'pivot', 'write', 'chart', 'WoW', 'other']
+
+
+class StageTimer:
+    """ Replaces methods on one analyzer instance with timed versions and adds up exclusive time per stage. """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self._child_seconds = [] # Time spent in timed calls nested in each running timed call
+        self._rollup_depth = 0
+
+    def wrap(self, obj, method_name, stage, rollup=False):
+        """ Time obj.method_name as stage; with rollup=True, timed calls made inside it count as stage too. """
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            if self._rollup_depth:
+                return method(*args, **kwargs)
+            self._child_seconds.append(0.0)
+            self._rollup_depth += rollup
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self._rollup_depth -= rollup
+                self.seconds[stage] += elapsed - self._child_seconds.pop()
+                if self._child_seconds:
+                    self._child_seconds[-1] += elapsed
+
+        setattr(obj, method_name, timed)
+
+
+def run_comparison_script(base_path, output_folder):
+    analyzer = ComparisonScript.WorklistAnalyzer()
+    analyzer.base_path = base_path
+    analyzer.output_folder = output_folder
+    timer = StageTimer()
+    for method_name, stage in [('get_week_folder', 'discover'), ('find_excel_files_in_folder', 'discover'),
+                               ('read_worklist_file', 'read'), ('_load_worklist_file', 'clean'),
+                               ('_partition_by_market', 'partition'), ('_compact_dtypes', 'partition'),
+                               ('create_pivot_tables', 'pivot'), ('_create_single_market_file', 'write'),
+                               ('create_practice_visualization', 'chart'), ('diff_member_weeks', 'WoW')]:
+        timer.wrap(analyzer, method_name, stage)
+    timer.wrap(analyzer, '_get_previous_week_comparison_data', 'WoW', rollup=True)
+
+    start = time.perf_counter()
+    results = analyzer.run_week('04.28')
+    total = time.perf_counter() - start
+    if not results or any(result['status'] != 'created' for result in results):
+        raise RuntimeError(f"ComparisonScript did not create every report: {results}")
+    return timer.seconds, total
+
+
+def run_better_script(base_path, output_folder):
+    analyzer = Better_script.WorklistAnalyzer()
+    analyzer.base_path = base_path
+    analyzer.output_folder = output_folder
+    timer = StageTimer()
+    for method_name, stage in [('get_week_folder', 'discover'), ('find_excel_files_in_folder', 'discover'),
+                               ('process_worklists', 'clean'), ('partition_by_market', 'partition'),
+                               ('create_pivot_tables', 'pivot'), ('create_market_files', 'write'),
+                               ('create_practice_visualization', 'chart')]:
+        timer.wrap(analyzer, method_name, stage)
+
+    start = time.perf_counter()
+    market_dfs = analyzer.run_week('04.28')
+    total = time.perf_counter() - start
+    if not market_dfs:
+        raise RuntimeError("Better_script found no data")
+    # Workbook parsing happens inside process_worklists' loop; it times it per file
+    read_seconds = sum(analyzer.file_parse_times.values())
+    timer.seconds['read'] += read_seconds
+    timer.seconds['clean'] -= read_seconds
+    return timer.seconds, total
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"{'rows':>7} " + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'total':>8}")
+    for num_rows, seconds, total in rows:
+        seconds = dict(seconds)
+        seconds['other'] = total - sum(seconds.values())
+        cells = [f"{seconds[stage]:>9.2f}" if stage in seconds else f"{'-':>9}" for stage in STAGES]
+        print(f"{num_rows:>7} " + " ".join(cells) + f" {total:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000, 20000], help='worklist rows per market per week')
+    parser.add_argument('--markets', type=int, default=4)
+    parser.add_argument('--sheets', type=int, default=2)
+    parser.add_argument('--practices', type=int, default=40)
+    parser.add_argument('--keep', help='write the synthetic data and reports under this folder instead of a temp folder')
+    args = parser.parse_args()
+
+    comparison_rows, better_rows = [], []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(args.keep or temp_dir)
+        for num_rows in args.rows:
+            scale_dir = root / f"rows_{num_rows}"
+            start = time.perf_counter()
+            generate_weeks(scale_dir / 'worklists', rows=num_rows, sheets=args.sheets,
+                           markets=args.markets, practices=args.practices)
+            print(f"Generated {num_rows} rows x {args.markets} markets x 2 weeks in {time.perf_counter() - start:.1f}s")
+
+            log = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(log):
+                    comparison = run_comparison_script(scale_dir / 'worklists', scale_dir / 'ComparisonScript')
+                    better = run_better_script(scale_dir / 'worklists', scale_dir / 'Better_script')
+            except Exception:
+                print(log.getvalue()[-3000:])
+                raise
+            comparison_rows.append((num_rows, *comparison))
+            better_rows.append((num_rows, *better))
+
+    settings = f"rows per market per week, {args.markets} markets, {args.sheets} worklist sheets, seconds"
+    print_table(f"ComparisonScript ({settings})", comparison_rows)
+    print_table(f"Better_script ({settings})", better_rows)
+
+
+if __name__ == "__main__":
+    main()
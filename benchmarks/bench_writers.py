@@ -0,0 +1,83 @@
+"""
+Benchmark: report writer backends (WorklistAnalyzer.writer_engine).
+
+Writes a synthetic "<market> Data" tab (43 columns) plus a pivot-sized sheet with
+each backend, every backend in a fresh interpreter so its peak RSS is measured on
+its own. Reports time-to-write and how much the write raised the peak RSS.
+
+Usage: python benchmarks/bench_writers.py [--rows 50000]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import REPORT_WRITERS, WorklistAnalyzer, _peak_rss_mb
+
+
+def make_market_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for idx, col in enumerate(WorklistAnalyzer.FULL_COLUMNS):
+        if idx % 5 == 0:
+            data[col] = rng.integers(0, 100000, rows)
+        elif idx % 7 == 0:
+            data[col] = rng.random(rows).round(3)
+        else:
+            data[col] = np.char.add(f"{col[:6]} ", rng.integers(0, 5000, rows).astype(str)).astype(object)
+    return pd.DataFrame(data)
+
+
+def run_child(engine, rows, out_dir):
+    """ Write one workbook with the given backend and print the measurements as JSON. """
+    df = make_market_frame(rows)
+    pivot = df.groupby('PracticeName').size().to_frame('Total')
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    with REPORT_WRITERS[engine](Path(out_dir) / f"{engine}.xlsx") as writer:
+        writer.write_frame(df, 'MKT Data', index=False)
+        writer.set_column_widths('MKT Data', [20] * len(df.columns))
+        writer.write_frame(pivot, 'Practice_Escalations', index=True)
+    elapsed = time.perf_counter() - start
+    rss_after = _peak_rss_mb()
+    print(json.dumps({'engine': engine, 'seconds': elapsed, 'rss_before_mb': rss_before, 'rss_peak_mb': rss_after,
+                      'size_mb': (Path(out_dir) / f"{engine}.xlsx").stat().st_size / 1024 / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--out-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.rows, args.out_dir)
+        return
+
+    print(f"Writing {args.rows} rows x {len(WorklistAnalyzer.FULL_COLUMNS)} columns per backend")
+    print(f"{'backend':<12} {'write s':>8} {'peak RSS MB':>12} {'RSS added MB':>13} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for engine in REPORT_WRITERS:
+            proc = subprocess.run([sys.executable, __file__, '--child', engine, '--rows', str(args.rows),
+                                   '--out-dir', out_dir], capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{engine:<12} failed: {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            peak = result['rss_peak_mb']
+            added = peak - result['rss_before_mb'] if peak is not None else None
+            print(f"{engine:<12} {result['seconds']:>8.2f} "
+                  f"{peak if peak is not None else float('nan'):>12.1f} "
+                  f"{added if added is not None else float('nan'):>13.1f} {result['size_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Synthetic worklist generator: "Week of MM.DD" folders of multi-sheet worklist workbooks.
+
+Each market gets one "MM.DD <Market> Med Adherence Escalations.xlsx" per week (the
+pattern find_excel_files_in_folder expects) with the worklist columns the scripts
+read (WorklistAnalyzer.FULL_COLUMNS plus the comparison-only ones). The first sheet
+holds the worklist, further sheets hold more worklist rows, and a Validation_Lists
+sheet holds the dropdown values, like the real files. Members carry over between
+weeks with some churn, so the week-over-week sheets have new, dropped and
+persisting members. With noise > 0 some header labels are re-cased or padded with
+spaces, differently per file.
+
+No real patient data is involved: names, ids, phone numbers and addresses are made up.
+
+Usage: python benchmarks/make_worklists.py OUT_DIR [--weeks 04.21 04.28] [--rows 5000] [--sheets 2]
+           [--markets 4] [--practices 40] [--noise 0.3] [--churn 0.15] [--seed 0]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ComparisonScript import WorklistAnalyzer
+
+WORKLIST_COLUMNS = WorklistAnalyzer.FULL_COLUMNS + [
+    col for col in WorklistAnalyzer.COMPARISON_COLUMNS if col not in WorklistAnalyzer.FULL_COLUMNS]
+
+DATE_COLUMNS = [
+    'LastImpactableDate','DateOfBirth','LastFillDate','NextFillDate',
+    'Initial Fill Date','Last Activity Date','DataAsOfDate',
+    'Escalation Timeframe','Escalation Deadline'
+]
+
+MARKET_CODES = ['ATL', 'AUS', 'HOU', 'DAL', 'SAN', 'PHX', 'CHI', 'IND', 'CIN', 'LOU', 'KNX', 'MEM', 'ORL', 'TPA', 'JAX', 'NSH']
+
+ESCALATION_PATHS = ['Market/PHO Escalation', 'Practice Escalation']
+OTHER_PATHS = ['No Escalation', 'Pharmacy Outreach', None]
+
+CHOICES = {
+    'Rx Status': ['Active', 'Expired', 'On Hold', 'Transferred'],
+    'Call Disposition': ['Reached Patient', 'Left Voicemail', 'Wrong Number', 'No Answer', 'Declined'],
+    'Current Barrier': ['Cost', 'Side Effects', 'Forgetfulness', 'Transportation', 'None Identified'],
+    'Action': ['Refill Requested', 'Provider Contacted', 'Education Provided', 'Follow Up Scheduled'],
+    'Escalation Resolution': ['Resolved', 'Pending', 'Unable to Resolve', None],
+    'PayerCode': ['UHC', 'HUM', 'AET', 'WCR', 'CVS'],
+    'United Flag': ['Y', 'N'],
+    'MedAdherenceMeasureCode': ['MAC', 'MAD', 'MAH'],
+    'NDCDesc': ['ATORVASTATIN 20MG', 'LISINOPRIL 10MG', 'METFORMIN 500MG', 'ROSUVASTATIN 10MG', 'LOSARTAN 50MG'],
+    'Impact Category': ['Impactable', 'Not Impactable', 'At Risk'],
+    'Gap Priority': ['High', 'Medium', 'Low'],
+    'Task Status': ['Open', 'In Progress', 'Closed'],
+    'OneFillCode': ['1F', '2F', 'NF'],
+    'Gap Completed': ['Y', 'N'],
+}
+
+
+def make_sheet(rng, market_code, practices, providers, member_ids, member_escalated, week_date):
+    """ One worklist sheet for a market: a WORKLIST_COLUMNS row per member, escalated when the member is. """
+    rows = len(member_ids)
+    def pick(values, missing=0.0):
+        picked = np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+        if missing:
+            picked[rng.random(rows) < missing] = None
+        return picked
+
+    def dates(low_days, high_days, missing=0.05):
+        days = rng.integers(low_days, high_days, rows)
+        values = (pd.Timestamp(week_date) + pd.to_timedelta(days, unit='D')).to_pydatetime().astype(object)
+        values[rng.random(rows) < missing] = None
+        return values
+
+    paths = np.where(member_escalated, pick(ESCALATION_PATHS), pick(OTHER_PATHS))
+    data = {
+        'LastImpactableDate': dates(0, 120),
+        'PatientName': np.char.add('Patient ', rng.integers(0, 10**6, rows).astype(str)).astype(object),
+        'DateOfBirth': dates(-32000, -18000, missing=0.01),
+        'PracticeName': pick(practices, missing=0.01),
+        'PCP': pick(providers, missing=0.05),
+        'QS Notes': np.char.add('Outreach note ', rng.integers(0, 500, rows).astype(str)).astype(object),
+        'Escalation Path': paths,
+        'Escalation Timeframe': dates(0, 14, missing=0.3),
+        'Escalation Deadline': dates(7, 30, missing=0.3),
+        'MarketCode': np.full(rows, market_code, dtype=object),
+        'PayerMemberId': member_ids,
+        'PatientPhoneNumber': np.char.add('555-', rng.integers(1000000, 9999999, rows).astype(str)).astype(object),
+        'PatientAddress': np.char.add(rng.integers(1, 9999, rows).astype(str), ' Main St').astype(object),
+        'DataAsOfDate': np.full(rows, pd.Timestamp(week_date).to_pydatetime(), dtype=object),
+        'EMR ID': rng.integers(10**6, 10**7, rows),
+        'PDCNbr': rng.random(rows).round(2),
+        'ADRNbr': rng.integers(0, 60, rows),
+        'DaysMissedNbr': rng.integers(0, 90, rows),
+        'Total Fills Column?': rng.integers(1, 13, rows),
+        'Initial Fill Date': dates(-365, -30),
+        'LastFillDate': dates(-90, 0),
+        'NextFillDate': dates(0, 90),
+        'DrugDispensedQuantityNbr': rng.choice([30, 60, 90], rows),
+        'DrugDispensedDaysSupplyNbr': rng.choice([30, 90], rows),
+        'Last Activity Date': dates(-14, 0, missing=0.1),
+        'PrescriberNPI': rng.integers(10**9, 2 * 10**9, rows),
+        'PrescribingName': pick(providers),
+        'Prescriber Phone Number': np.char.add('555-', rng.integers(1000000, 9999999, rows).astype(str)).astype(object),
+        'PharmacyStoreName': pick([f"Pharmacy {p:03d}" for p in range(60)]),
+        'PharmacyCommunicationNumberText': np.char.add('555-', rng.integers(1000000, 9999999, rows).astype(str)).astype(object),
+    }
+    for col, values in CHOICES.items():
+        data[col] = pick(values)
+    return pd.DataFrame({col: data[col] for col in WORKLIST_COLUMNS})
+
+
+def noisy_header(rng, columns, noise):
+    """ Re-case or pad about a noise share of the labels, the way hand-edited workbooks drift. """
+    header = []
+    for col in columns:
+        if rng.random() < noise:
+            col = [col.upper(), col.lower(), f" {col}", f"{col} "][rng.integers(0, 4)]
+        header.append(col)
+    return header
+
+
+def write_workbook(path, sheets):
+    """ Write {sheet name: frame} with xlsxwriter when available (much faster), else openpyxl. """
+    try:
+        import xlsxwriter # noqa: F401
+        engine = 'xlsxwriter' # Not constant_memory: pandas writes column by column
+    except ImportError:
+        engine = 'openpyxl'
+    with pd.ExcelWriter(path, engine=engine) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def generate_weeks(out_dir, weeks=('04.21', '04.28'), rows=5000, sheets=2, markets=4, practices=40,
+                   noise=0.3, escalation_share=0.3, churn=0.15, year=None, seed=0):
+    """
+    Write a "Week of MM.DD" folder per week under out_dir. rows is the number of worklist rows
+    per market per week, split over sheets data sheets. Returns the list of files written.
+    """
+    rng = np.random.default_rng(seed)
+    out_dir = Path(out_dir)
+    year = year or datetime.now().year
+    market_codes = (MARKET_CODES + [f"M{m:02d}" for m in range(len(MARKET_CODES), markets)])[:markets]
+
+    market_setup = {}
+    for market_code in market_codes:
+        market_practices = [f"{market_code} Family Medicine {p:03d}" for p in range(practices)]
+        market_providers = [f"Dr. {market_code} Provider {p:04d}" for p in range(practices * 4)]
+        pool = np.char.add(f"{market_code[0]}", (rng.choice(10**9, size=rows * 2, replace=False) + 10**9).astype(str))
+        pool = pool.astype(object)
+        numeric = rng.random(len(pool)) < 0.7 # Most payers send numeric ids
+        pool[numeric] = [int(member_id[1:]) for member_id in pool[numeric]]
+        escalated = rng.random(len(pool)) < escalation_share # Escalated members stay escalated while on the list
+        market_setup[market_code] = (market_practices, market_providers, pool, escalated)
+
+    written = []
+    for week_number, week in enumerate(weeks):
+        week_date = datetime.strptime(f"{year}.{week}", '%Y.%m.%d')
+        folder = out_dir / f"Week of {week}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for market_code in market_codes:
+            market_practices, market_providers, pool, escalated = market_setup[market_code]
+            # The week's members slide through the pool, so about churn of them change each week
+            offset = int(rows * churn * week_number) % len(pool)
+            week_members = np.roll(pool, -offset)[:rows]
+            week_escalated = np.roll(escalated, -offset)[:rows]
+            sheet_bounds = np.linspace(0, rows, sheets + 1).astype(int)
+            workbook = {}
+            for sheet_number, (low, high) in enumerate(zip(sheet_bounds[:-1], sheet_bounds[1:])):
+                df = make_sheet(rng, market_code, market_practices, market_providers,
+                                week_members[low:high], week_escalated[low:high], week_date)
+                df.columns = noisy_header(rng, df.columns, noise)
+                workbook['Worklist' if sheet_number == 0 else f"Worklist {sheet_number + 1}"] = df
+            workbook['Validation_Lists'] = pd.DataFrame({'Escalation Path': ESCALATION_PATHS + ['No Escalation']})
+            path = folder / f"{week} {market_code} Med Adherence Escalations.xlsx"
+            write_workbook(path, workbook)
+            written.append(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--weeks', nargs='+', default=['04.21', '04.28'], metavar='MM.DD')
+    parser.add_argument('--rows', type=int, default=5000, help='worklist rows per market per week')
+    parser.add_argument('--sheets', type=int, default=2, help='worklist sheets per workbook')
+    parser.add_argument('--markets', type=int, default=4)
+    parser.add_argument('--practices', type=int, default=40, help='practices per market')
+    parser.add_argument('--noise', type=float, default=0.3, help='share of header labels re-cased or padded')
+    parser.add_argument('--escalation-share', type=float, default=0.3, help='share of members with an escalation path')
+    parser.add_argument('--churn', type=float, default=0.15, help='share of members replaced from one week to the next')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = generate_weeks(args.out_dir, args.weeks, args.rows, args.sheets, args.markets, args.practices,
+                             args.noise, args.escalation_share, args.churn, seed=args.seed)
+    print(f"Wrote {len(written)} workbook(s) under {args.out_dir} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
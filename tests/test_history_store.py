@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from ComparisonScript import WorklistAnalyzer
+
+
+def make_analyzer(tmp_path):
+    analyzer = WorklistAnalyzer()
+    analyzer.base_path = tmp_path # No week folders: stored weeks have no source files to go stale
+    analyzer.history_db = tmp_path / 'history.sqlite'
+    analyzer.current_year = 2026
+    analyzer.set_date('04.28')
+    return analyzer
+
+
+def comparison_frame(analyzer, rows):
+    df = pd.DataFrame({
+        'PayerMemberId': pd.Series([1001, 'M2002', np.nan, 1003, 1001, 'M2004'][:rows], dtype=object),
+        'MarketCode': ['AUS'] * rows,
+        'PracticeName': ['North Clinic', 'North Clinic', 'South Clinic', 'North Clinic', 'South Clinic', np.nan][:rows],
+        'PCP': ['Dr. A', np.nan, 'Dr. B', 'Dr. A', 'Dr. B', 'Dr. C'][:rows],
+        'Escalation Path': ['Pharmacy', 'Provider', 'Pharmacy', 'Pharmacy', 'Provider', 'Pharmacy'][:rows],
+        'Escalation Resolution': [np.nan, 'Resolved', np.nan, np.nan, 'Open', np.nan][:rows],
+        'Gap Completed': ['Yes', 'No', 'No', 'Yes', 'No', 'No'][:rows],
+        'PatientName': [f"Patient {i}" for i in range(rows)],
+    })
+    return analyzer._compact_dtypes(df) # As _process_single_week_data hands weeks over
+
+
+def test_week_round_trips_with_dtypes(tmp_path):
+    analyzer = make_analyzer(tmp_path)
+    market_dfs = {'AUS': comparison_frame(analyzer, 6), 'DAL': comparison_frame(analyzer, 2)[['PayerMemberId', 'MarketCode']]}
+    assert isinstance(market_dfs['AUS']['Gap Completed'].dtype, pd.CategoricalDtype)
+
+    analyzer.store_week_history('04.21', market_dfs)
+    loaded = analyzer.load_week_history('04.21')
+
+    assert list(loaded) == list(market_dfs)
+    for market, df in market_dfs.items():
+        pd.testing.assert_frame_equal(loaded[market], df)
+    assert [type(value) for value in loaded['AUS']['PayerMemberId'].dropna()] == [int, str, int, int, str]
+
+
+def test_storing_a_week_again_replaces_it_and_missing_weeks_load_as_none(tmp_path):
+    analyzer = make_analyzer(tmp_path)
+    assert analyzer.load_week_history('04.21') is None
+    analyzer.store_week_history('04.21', {'AUS': comparison_frame(analyzer, 6)})
+    analyzer.store_week_history('04.21', {'AUS': comparison_frame(analyzer, 3)})
+    loaded = analyzer.load_week_history('04.21')
+    pd.testing.assert_frame_equal(loaded['AUS'], comparison_frame(analyzer, 3))
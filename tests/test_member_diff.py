@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from ComparisonScript import WorklistAnalyzer
+
+ID_COL = 'PayerMemberId'
+
+
+def set_diff(previous_df, current_df):
+    """ The per-market set logic diff_member_weeks replaced: first row of each new / dropped / persisting member. """
+    current_ids = set(current_df[ID_COL].dropna().unique()) if len(current_df) else set()
+    prev_ids = set(previous_df[ID_COL].dropna().unique()) if len(previous_df) else set()
+
+    def first_rows(df, ids):
+        if not len(df):
+            return []
+        rows = df.reset_index(drop=True)
+        return list(rows[rows[ID_COL].isin(ids)].drop_duplicates(subset=[ID_COL]).index)
+
+    return {'new': first_rows(current_df, current_ids - prev_ids),
+            'dropped': first_rows(previous_df, prev_ids - current_ids),
+            'persisting': first_rows(current_df, current_ids & prev_ids),
+            'current_ids': len(current_ids), 'previous_ids': len(prev_ids)}
+
+
+def frame(ids):
+    return pd.DataFrame({ID_COL: pd.Series(ids, dtype=object), 'PatientName': [f"P{i}" for i in range(len(ids))]})
+
+
+def test_diff_matches_set_based_diff():
+    weeks = [
+        {'AUS': frame([101, 'M7', 102, 101, np.nan, 103]), 'DAL': frame([5, 6]), 'HOU': frame([1, 2])},
+        {'AUS': frame(['M7', 104, np.nan, 102, 104, 'M8']), 'DAL': frame([6, 7, 5]), 'SAT': frame([1])},
+        {'AUS': frame([]), 'DAL': frame([7, 'X', 7]), 'SAT': frame([1, 2])},
+    ]
+    diffs = WorklistAnalyzer().diff_member_weeks(weeks)
+    assert len(diffs) == len(weeks) - 1
+    markets = {market for market_dfs in weeks for market in market_dfs} # Every pair covers every market
+    for week, diff in enumerate(diffs, start=1):
+        assert set(diff) == markets
+        for market in markets:
+            expected = set_diff(weeks[week - 1].get(market, frame([])), weeks[week].get(market, frame([])))
+            got = diff[market]
+            for key in ('new', 'dropped', 'persisting'):
+                assert list(got[key]) == expected[key], (week, market, key)
+            assert got['current_ids'] == expected['current_ids']
+            assert got['previous_ids'] == expected['previous_ids']
+
+
+def test_same_member_in_two_markets_is_diffed_per_market():
+    weeks = [{'AUS': frame([1]), 'DAL': frame([2])}, {'AUS': frame([2]), 'DAL': frame([1])}]
+    diff = WorklistAnalyzer().diff_member_weeks(weeks)[0]
+    assert list(diff['AUS']['new']) == [0] and list(diff['AUS']['dropped']) == [0]
+    assert list(diff['DAL']['persisting']) == []
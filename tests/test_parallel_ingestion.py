@@ -0,0 +1,43 @@
+import functools
+import multiprocessing
+import os
+
+import pandas as pd
+
+import ComparisonScript
+from ComparisonScript import WorklistAnalyzer
+
+
+def write_worklist(path, market_code, rows):
+    pd.DataFrame({
+        'PayerMemberId': range(1, rows + 1),
+        'MarketCode': [market_code] * rows,
+        'PracticeName': ['North Clinic'] * rows,
+        'Escalation Path': ['Practice Escalation'] * rows,
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_a_crashing_worker_only_loses_its_own_file(tmp_path, monkeypatch):
+    files = [write_worklist(tmp_path / f"04.28 {market} Med Adherence Escalations.csv", market, rows)
+             for market, rows in [('ATL', 3), ('AUS', 4), ('HOU', 5)]]
+    parent_pid = os.getpid()
+    load_worklist_file = WorklistAnalyzer._load_worklist_file
+
+    def crash_on_aus(self, file_path, *args):
+        if 'AUS' in file_path.name and os.getpid() != parent_pid:
+            os._exit(1) # The worker process dies outright, breaking the pool
+        return load_worklist_file(self, file_path, *args)
+
+    # Forked workers see the patched loader
+    monkeypatch.setattr(WorklistAnalyzer, '_load_worklist_file', crash_on_aus)
+    monkeypatch.setattr(ComparisonScript, 'ProcessPoolExecutor', functools.partial(
+        ComparisonScript.ProcessPoolExecutor, mp_context=multiprocessing.get_context('fork')))
+
+    analyzer = WorklistAnalyzer()
+    analyzer.max_workers = 2
+    loaded = list(analyzer._load_worklists(files, WorklistAnalyzer.FULL_COLUMNS, [], False))
+
+    assert [(file_path.name[6:9], len(df)) for file_path, df, _ in loaded] == [('ATL', 3), ('HOU', 5)]
+    errors = [entry['name'] for entry in analyzer.recorder.of_kind('file') if entry.get('error')]
+    assert errors == [files[1].name]
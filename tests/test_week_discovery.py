@@ -0,0 +1,45 @@
+from ComparisonScript import WorklistAnalyzer
+
+
+def make_analyzer(tmp_path, folder_names, current_year=2026):
+    for name in folder_names:
+        (tmp_path / name).mkdir()
+    analyzer = WorklistAnalyzer()
+    analyzer.base_path = tmp_path
+    analyzer.current_year = current_year
+    return analyzer
+
+
+def test_week_and_previous_week_resolve_in_the_year_named_by_the_folder(tmp_path):
+    analyzer = make_analyzer(tmp_path, ['Week of 12.29.25', 'Week of 12.22.2025', 'Week of 4.28.25'])
+    analyzer.set_date('12.29')
+    assert analyzer.get_week_folder('12.29').name == 'Week of 12.29.25'
+    assert analyzer._week_key('12.29') == '2025-12-29'
+    assert analyzer.get_week_folder(analyzer.previous_date).name == 'Week of 12.22.2025'
+    assert analyzer._week_key(analyzer.previous_date) == '2025-12-22'
+    assert analyzer.discovery_stats['year_fallbacks'] == 1 # Only the current week needed the fallback
+
+
+def test_rerunning_last_years_week_falls_back_to_the_newest_tagged_folder(tmp_path):
+    analyzer = make_analyzer(tmp_path, ['Week of 4.28.24', 'Week of 4.28.25', 'Week of 4.21.25'])
+    analyzer.set_date('04.28')
+    assert analyzer.get_week_folder('04.28').name == 'Week of 4.28.25'
+    assert analyzer.get_week_folder('04.21').name == 'Week of 4.21.25'
+
+
+def test_previous_week_across_new_year(tmp_path):
+    analyzer = make_analyzer(tmp_path, ['Week of 01.05.2026', 'Week of 12.29.25', 'Week of 12.29.2026'])
+    analyzer.set_date('01.05')
+    assert analyzer.get_week_folder('01.05').name == 'Week of 01.05.2026'
+    assert analyzer.previous_date == '12.29'
+    assert analyzer.get_week_folder('12.29').name == 'Week of 12.29.25'
+    assert analyzer.discovery_stats['year_fallbacks'] == 0
+
+
+def test_folder_names_are_parsed_not_substring_matched(tmp_path):
+    analyzer = make_analyzer(tmp_path, ['Week of 4.21', 'Week of 4.2', 'Week of 04.28', 'Week of 4.28'])
+    analyzer.set_date('04.28')
+    assert analyzer.get_week_folder('04.02').name == 'Week of 4.2'
+    assert analyzer.get_week_folder('04.28').name == 'Week of 04.28' # MM.DD preferred
+    assert analyzer.discovery_stats['listings'] == 1 # base_path listed once for every lookup
+    assert analyzer.discovery_stats['index_hits'] == 1
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ComparisonScript import WorklistAnalyzer
+
+
+def mixed_frame():
+    return pd.DataFrame({
+        'PayerMemberId': pd.Series([1001, 'M2002', np.nan, 123456789012345, '0042'], dtype=object),
+        'MarketCode': ['AUS', 'AUS', np.nan, 'DAL', 'DAL'],
+        'Gap Completed': pd.Series([True, 'No', 1.5, np.nan, datetime(2026, 4, 28, 9, 30)], dtype=object),
+        'PDCNbr': [0.8, 0.9, np.nan, 1.0, 0.5],
+    })
+
+
+def cell_types(series):
+    """ Python type of each cell; datetimes come back as pd.Timestamp, which is a datetime. """
+    return [datetime if isinstance(value, datetime) else type(value) for value in series]
+
+
+def assert_same_cells(decoded, df, columns):
+    pd.testing.assert_frame_equal(decoded, df)
+    for col in columns:
+        assert cell_types(decoded[col]) == cell_types(df[col]), col
+
+
+def test_mixed_ids_round_trip_through_parquet(tmp_path):
+    analyzer = WorklistAnalyzer()
+    df = mixed_frame()
+    encoded, encoded_columns = analyzer._encode_mixed_columns(df)
+    assert encoded_columns == ['PayerMemberId', 'Gap Completed'] # All-text MarketCode is stored as is
+    encoded.to_parquet(tmp_path / 'frame.parquet')
+    decoded = analyzer._decode_mixed_columns(pd.read_parquet(tmp_path / 'frame.parquet'), encoded_columns)
+    assert_same_cells(decoded[encoded_columns], df[encoded_columns], encoded_columns)
+
+
+def test_cache_hit_returns_the_stored_frame(tmp_path):
+    analyzer = WorklistAnalyzer()
+    analyzer.cache_folder = tmp_path / 'cache'
+    worklist = tmp_path / 'AUS worklist 04.28.xlsx'
+    worklist.write_bytes(b'not read: only fingerprinted')
+    df = mixed_frame().drop(columns='Gap Completed')
+    args = (worklist, list(df.columns), [], False)
+
+    cache_context, cached = analyzer._cache_lookup(*args)
+    assert cached is None
+    analyzer._cache_store(cache_context, df, 7)
+
+    analyzer = WorklistAnalyzer() # A later run reads the index back from disk
+    analyzer.cache_folder = tmp_path / 'cache'
+    _, cached = analyzer._cache_lookup(*args)
+    assert analyzer.cache_stats == {'hits': 1, 'misses': 0}
+    assert cached[1] == 7
+    assert_same_cells(cached[0], df, df.columns[df.dtypes == object]) # Missing text back as NaN, not None
+
+    worklist.write_bytes(b'changed contents')
+    assert analyzer._cache_lookup(*args)[1] is None
@@ -0,0 +1,19 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+from worklist_sheets import format_date_cells
+
+
+def test_date_cells_are_written_with_the_number_format(tmp_path):
+    df = pd.DataFrame({'PayerMemberId': [1, 2, 3],
+                       'Last Fill Date': pd.to_datetime(['2026-04-21', None, '2026-04-28']),
+                       'Due Date': pd.to_datetime(['2026-05-01', '2026-05-02', '2026-05-03'])})
+    path = tmp_path / 'dates.xlsx'
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Data', index=False)
+        format_date_cells(writer.sheets['Data'], [2, 3], len(df), 'mm/dd/yyyy')
+
+    worksheet = load_workbook(path)['Data']
+    formats = [[cell.number_format for cell in row] for row in worksheet.iter_rows(min_row=2)]
+    assert formats == [['General', 'mm/dd/yyyy', 'mm/dd/yyyy']] * 3
+    assert worksheet['A1'].number_format == 'General' # Header row left alone
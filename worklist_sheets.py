@@ -0,0 +1,158 @@
+"""
+Sheet helpers shared by ComparisonScript and Better_script: resolving worklist headers,
+projecting streamed worksheet rows onto the wanted columns, auto-fitting report column
+widths and giving date cells a number format.
+"""
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
+
+
+class HeaderResolver:
+    """
+    Matches desired columns against header rows. Resolutions are memoized per header
+    signature, since nearly every sheet of a week shares one header; stats counts the
+    resolutions served from the memo ('hits') and added to it ('misses').
+    """
+
+    def __init__(self):
+        self.stats = {'hits': 0, 'misses': 0}
+        self._resolutions = {} # Header signature -> resolved columns
+
+    def resolve(self, header, desired_columns, required_columns=()):
+        """
+        Match desired_columns against a header (stripped, case-insensitive, first match wins).
+        Returns {'mapping': desired -> actual label, 'positions': matched header positions in
+        header order, 'names': the desired name at each of those positions, 'missing_required':
+        required columns without a match}.
+        """
+        signature = (tuple(header), tuple(desired_columns), tuple(required_columns))
+        resolved = self._resolutions.get(signature)
+        if resolved is not None:
+            self.stats['hits'] += 1
+            return resolved
+        self.stats['misses'] += 1
+
+        lookup = {} # lower-cased label -> first position
+        for position, col in enumerate(header):
+            if col is not None:
+                lookup.setdefault(str(col).strip().lower(), position)
+        mapping = {}
+        for desired_col in desired_columns:
+            position = lookup.get(desired_col.lower())
+            if position is not None:
+                mapping[desired_col] = header[position]
+        names_by_position = {lookup[desired_col.lower()]: desired_col for desired_col in mapping}
+        resolved = {
+            'mapping': mapping,
+            'positions': sorted(names_by_position),
+            'names': [names_by_position[position] for position in sorted(names_by_position)],
+            'missing_required': [col for col in required_columns if col not in mapping],
+        }
+        self._resolutions[signature] = resolved
+        return resolved
+
+
+def renamed_resolution(resolved):
+    """ The resolution of a frame whose columns were already renamed to the desired names. """
+    return {**resolved, 'mapping': {desired_col: desired_col for desired_col in resolved['mapping']}}
+
+
+def project_sheet_rows(rows, resolver, desired_columns, required_columns=()):
+    """
+    Build a DataFrame from a worksheet row iterator (header first), keeping only the
+    columns whose (stripped, case-insensitive) header matches desired_columns.
+    The header is resolved before any data row is read, so unmatched columns are
+    never materialized. Cell values are converted the same way pd.read_excel does.
+    Kept columns are named after desired_columns; the resolution is left in df.attrs['resolved'].
+    """
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+
+    # Resolve header -> positions of the desired columns (first match wins)
+    resolved = resolver.resolve(header, desired_columns, required_columns)
+    positions = resolved['positions']
+    if not positions:
+        return pd.DataFrame(columns=[str(col) for col in header if col is not None])
+
+    def convert(value):
+        if value is None: return ""
+        if isinstance(value, float) and value.is_integer(): return int(value)
+        if isinstance(value, str) and value in ERROR_CODES: return float('nan')
+        return value
+
+    data = [resolved['names']]
+    last_row_with_data = 0
+    for row in rows:
+        projected = [convert(row[idx]) if idx < len(row) else "" for idx in positions]
+        data.append(projected)
+        if any(value != "" for value in projected):
+            last_row_with_data = len(data) - 1
+    data = data[:last_row_with_data + 1] # Trim trailing empty rows
+
+    if len(data) == 1:
+        df = pd.DataFrame(columns=data[0])
+    else:
+        df = TextParser(data, header=0, skip_blank_lines=False).read()
+    df.attrs['resolved'] = renamed_resolution(resolved)
+    return df
+
+
+def fit_column_widths(df, max_width=None, index=False, scale=1.1, sample_rows=None, date_format=None):
+    """
+    Auto-fit widths for df as written to a sheet (index columns first when index=True).
+    Each width is (longest rendered value or header + 2) * scale, capped at max_width.
+    Frames longer than sample_rows are measured on an evenly spaced sample of rows.
+    date_format is the number format datetime columns are written with (None: written as text).
+    """
+    if index:
+        df = df.reset_index()
+    if sample_rows and len(df) > sample_rows:
+        df = df.iloc[np.linspace(0, len(df) - 1, sample_rows).astype(np.intp)]
+
+    value_lengths = np.zeros(df.shape[1], dtype=np.int64)
+    generic_positions = []
+    for position, dtype in enumerate(df.dtypes):
+        values = df.iloc[:, position]
+        if len(values) == 0:
+            continue
+        try:
+            if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+                # The longest integer rendering is always the smallest or the largest value
+                value_lengths[position] = max(len(str(values.min())), len(str(values.max())))
+            elif pd.api.types.is_datetime64_any_dtype(dtype) and date_format:
+                # Every date renders with the same number of characters as its format
+                value_lengths[position] = len(date_format) if values.notna().any() else 0
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                value_lengths[position] = values.astype(str).str.len().max()
+            else:
+                generic_positions.append(position)
+        except Exception:
+            pass # Fall back to the header length
+
+    # Everything else is rendered with str() in one pass over the remaining cells, column by column
+    if generic_positions and len(df):
+        try:
+            block = df.iloc[:, generic_positions].to_numpy(dtype=object)
+            lengths = np.fromiter(map(len, map(str, block.ravel(order='F'))), dtype=np.int64, count=block.size)
+            value_lengths[generic_positions] = lengths.reshape(len(generic_positions), len(df)).max(axis=1)
+        except Exception:
+            pass
+
+    widths = []
+    for column, value_length in zip(df.columns, value_lengths):
+        width = (max(int(value_length), len(str(column))) + 2) * scale
+        widths.append(min(width, max_width) if max_width else width)
+    return widths
+
+
+def format_date_cells(worksheet, columns, num_rows, number_format):
+    """
+    Give rows 2..num_rows + 1 of the given (1-based) worksheet columns a date number format.
+    pandas' openpyxl engine ignores ExcelWriter(datetime_format=...), so the cells are formatted here.
+    """
+    for col in columns:
+        for (cell,) in worksheet.iter_rows(min_row=2, max_row=num_rows + 1, min_col=col, max_col=col):
+            cell.number_format = number_format